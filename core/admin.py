@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from core.models import OTP, Booking, GuestProfile, Master, MasterAvailability, MasterLocation, User
+from core.models import OTP, Booking, GuestProfile, Master, MasterAvailability, MasterLocation, MasterWeeklySchedule, SmsOutbox, User
 
 # Register your models here.
 
@@ -35,6 +35,13 @@ class MasterAvailabilityAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(MasterWeeklySchedule)
+class MasterWeeklyScheduleAdmin(admin.ModelAdmin):
+    list_display = ('id', 'master_id', 'weekday', 'start_time', 'end_time', 'slot_minutes', 'discount_percent', 'updated_at')
+    list_filter = ('weekday',)
+    search_fields = ('master_id',)
+
+
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
     list_display = ('id', 'phone', 'code', 'created_at')
@@ -42,6 +49,14 @@ class OTPAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(SmsOutbox)
+class SmsOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'phone', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('phone',)
+    ordering = ('-created_at',)
+
+
 @admin.register(GuestProfile)
 class GuestProfileAdmin(admin.ModelAdmin):
     list_display = ('id', 'user_id', 'created_at')
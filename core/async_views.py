@@ -0,0 +1,89 @@
+import functools
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, NotFound
+
+from core.conditional import etag_matches, master_row_stamp, not_modified, weak_etag
+from core.models import Master
+from core.serializers import MasterDetailSerializer, MasterListSerializer
+from core.utils import afind_next_available, aget_masters_availability, aget_masters_change_stamps
+from core.views import _master_list_etag, _master_list_querysets, _next_available_days, _next_available_payload
+
+
+# master list / detail / next-available-time ning async variantlari (ASGI deploy,
+# settings.ASYNC_READ_VIEWS). DB ga faqat async ORM orqali boriladi, serializer
+# availability context bilan query qilmaydi. Javoblar sync DRF view lar bilan bir xil;
+# endpointlar ochiq, shuning uchun DRF authentication bu yerda ishlamaydi.
+
+
+def _error_response(exc):
+    # DRF exception_handler bilan bir xil format
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return JsonResponse(detail, status=exc.status_code, safe=False)
+
+
+def api_errors(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404 as exc:
+            return _error_response(NotFound(*exc.args))
+        except APIException as exc:
+            return _error_response(exc)
+    return wrapper
+
+
+def _json_response(data, etag=None):
+    response = JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+@require_GET
+@api_errors
+async def master_list(request):
+    page_queryset, total_queryset, build_page = _master_list_querysets(request)
+    total = await total_queryset.acount() if total_queryset is not None else None
+    masters_page, meta = build_page([m async for m in page_queryset], total)
+
+    stamps = await aget_masters_change_stamps([m.id for m in masters_page])
+    etag = _master_list_etag(request, meta, masters_page, stamps)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    availability = await aget_masters_availability(masters_page)
+    serializer = MasterListSerializer(
+        masters_page,
+        many=True,
+        context={'request': request, 'availability': availability}
+    )
+    return _json_response({**meta, "results": serializer.data}, etag)
+
+
+@require_GET
+@api_errors
+async def master_detail(request, id):
+    master = await aget_object_or_404(Master.objects.select_related('master_location'), id=id)
+
+    stamps = await aget_masters_change_stamps([master.id])
+    etag = weak_etag(master_row_stamp(master), stamps[master.id])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    availability = await aget_masters_availability([master])
+    serializer = MasterDetailSerializer(master, context={'request': request, 'availability': availability})
+    return _json_response(serializer.data, etag)
+
+
+@require_GET
+@api_errors
+async def master_next_available_time(request, master_id):
+    days = _next_available_days(request)
+    master = await aget_object_or_404(Master.objects.only('id'), id=master_id)
+    found = (await afind_next_available([master.id], days=days))[master.id]
+
+    return _json_response(_next_available_payload(master.id, found))
@@ -0,0 +1,169 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# (master_id, date) bo'yicha hisoblangan bo'sh slotlar snapshoti.
+# Har bir juftlikning versiyasi bor, snapshot kaliti versiyani o'z ichiga oladi:
+# yozuvchi versiyani oshiradi, eski snapshot o'z-o'zidan o'qilmaydigan bo'lib qoladi
+# (TTL tugaguncha cacheda yotadi). O'quvchi versiyani DB query dan OLDIN o'qiydi,
+# shuning uchun parallel yozuvdan keyin hisoblangan eski natija faqat eski versiya
+# kalitiga tushadi. Haftalik shablon o'zgarsa masterning barcha sanalari eskiradi,
+# buning uchun snapshot kalitida master darajasidagi versiya ham bor.
+
+
+def _cache():
+    return caches[getattr(settings, "AVAILABILITY_CACHE_ALIAS", "default")]
+
+
+def _ttl():
+    return getattr(settings, "AVAILABILITY_CACHE_SECONDS", 300)
+
+
+def _version_key(master_id, date):
+    return f"availability:{master_id}:{date.isoformat()}:v"
+
+
+def _master_version_key(master_id):
+    return f"availability:{master_id}:v"
+
+
+def _snapshot_key(master_id, date, version):
+    return f"availability:{master_id}:{date.isoformat()}:{version}"
+
+
+def _new_version():
+    # versiya kaliti evict bo'lsa ham eski snapshot bilan to'qnashmasligi uchun
+    return time.time_ns()
+
+
+def _bump(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, _new_version(), timeout=None):
+            cache.incr(key)
+
+
+def _invalidate_key(key):
+    """
+    Darhol va transaction commit bo'lgandan keyin ham versiyani oshiradi:
+    commitdan oldin boshqa so'rov eski ma'lumotni yangi versiyaga yozib qo'ysa ham,
+    commitdagi bump uni o'qilmaydigan qiladi.
+    """
+    if not _ttl():
+        return
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def invalidate(master_id, date):
+    _invalidate_key(_version_key(master_id, date))
+
+
+# haftalik shablon o'zgarganda: masterning barcha sanalari
+def invalidate_master(master_id):
+    _invalidate_key(_master_version_key(master_id))
+
+
+def _version_keys(master_ids, date):
+    return {
+        master_id: (_master_version_key(master_id), _version_key(master_id, date))
+        for master_id in master_ids
+    }
+
+
+def _join_versions(keys, found):
+    return {master_id: ".".join(str(found[key]) for key in pair) for master_id, pair in keys.items()}
+
+
+def _get_versions(master_ids, date):
+    cache = _cache()
+    keys = _version_keys(master_ids, date)
+    found = cache.get_many([key for pair in keys.values() for key in pair])
+
+    for pair in keys.values():
+        for key in pair:
+            if key not in found:
+                cache.add(key, _new_version(), timeout=None)
+                found[key] = cache.get(key)
+    return _join_versions(keys, found)
+
+
+async def _aget_versions(master_ids, date):
+    cache = _cache()
+    keys = _version_keys(master_ids, date)
+    found = await cache.aget_many([key for pair in keys.values() for key in pair])
+
+    for pair in keys.values():
+        for key in pair:
+            if key not in found:
+                await cache.aadd(key, _new_version(), timeout=None)
+                found[key] = await cache.aget(key)
+    return _join_versions(keys, found)
+
+
+def _split_cached(keys, cached, now_ts):
+    result, missing = {}, []
+    for master_id, key in keys.items():
+        snapshot = cached.get(key)
+        if snapshot is None or (snapshot["valid_until"] and snapshot["valid_until"] <= now_ts):
+            missing.append(master_id)
+        else:
+            result[master_id] = snapshot
+    return result, missing
+
+
+def _snapshot_timeout(snapshot, ttl, now_ts):
+    if snapshot["valid_until"]:
+        return max(1, min(ttl, int(snapshot["valid_until"] - now_ts)))
+    return ttl
+
+
+def get_snapshots(master_ids, date, compute):
+    """
+    {master_id: snapshot} qaytaradi. Cacheda yo'qlari uchun compute(master_ids, date)
+    bitta chaqiriladi. Snapshotdagi "valid_until" (eng erta pending booking muddati)
+    o'tgan bo'lsa, snapshot eskirgan hisoblanadi.
+    """
+    now_ts = time.time()
+    ttl = _ttl()
+    if not ttl or not master_ids:
+        return compute(master_ids, date)
+
+    cache = _cache()
+    versions = _get_versions(master_ids, date)
+    keys = {master_id: _snapshot_key(master_id, date, versions[master_id]) for master_id in master_ids}
+    result, missing = _split_cached(keys, cache.get_many(keys.values()), now_ts)
+
+    if missing:
+        computed = compute(missing, date)
+        for master_id, snapshot in computed.items():
+            cache.set(keys[master_id], snapshot, timeout=_snapshot_timeout(snapshot, ttl, now_ts))
+        result.update(computed)
+
+    return result
+
+
+# get_snapshots ning async varianti (ASGI view lar uchun), acompute - coroutine
+async def aget_snapshots(master_ids, date, acompute):
+    now_ts = time.time()
+    ttl = _ttl()
+    if not ttl or not master_ids:
+        return await acompute(master_ids, date)
+
+    cache = _cache()
+    versions = await _aget_versions(master_ids, date)
+    keys = {master_id: _snapshot_key(master_id, date, versions[master_id]) for master_id in master_ids}
+    result, missing = _split_cached(keys, await cache.aget_many(keys.values()), now_ts)
+
+    if missing:
+        computed = await acompute(missing, date)
+        for master_id, snapshot in computed.items():
+            await cache.aset(keys[master_id], snapshot, timeout=_snapshot_timeout(snapshot, ttl, now_ts))
+        result.update(computed)
+
+    return result
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, Q, TextField, Value, When
+from django.utils import timezone
+
+from core import availability_cache
+from core.events import booking_event, publish_on_commit
+from core.models import Booking, BookingStatus
+
+
+# booking holatlari: maqsad holat -> qaysi holatlardan o'tish mumkin.
+# Har bir o'tish bitta shartli UPDATE ... WHERE id=? AND status IN (...),
+# o'zgargan qatorlar soni natijani hal qiladi (oldin o'qish yo'q).
+TRANSITIONS = {
+    BookingStatus.ACCEPTED: (BookingStatus.PENDING,),
+    BookingStatus.REJECTED: (BookingStatus.PENDING,),
+    BookingStatus.CONFIRMED: (BookingStatus.ACCEPTED,),
+    BookingStatus.CLIENT_NOT_CONFIRMED: (BookingStatus.ACCEPTED,),
+    BookingStatus.COMPLETED: (BookingStatus.ACCEPTED, BookingStatus.CONFIRMED),
+    BookingStatus.CANCELLED: (BookingStatus.PENDING,),
+}
+
+MASTER_ACTIONS = (BookingStatus.ACCEPTED, BookingStatus.REJECTED)
+
+# slotni band qilib turadigan holatlar (booking_active_slot_unique bilan bir xil)
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.ACCEPTED, BookingStatus.CONFIRMED)
+
+CLIENT_CONFIRM_CUTOFF_MINUTES = 30  # klient buyurtmadan kamida shuncha oldin javob beradi
+
+
+def transition_q(target, now):
+    sources = TRANSITIONS[target]
+    q = Q(status__in=sources)
+    if BookingStatus.PENDING in sources and target != BookingStatus.CANCELLED:
+        # muddati o'tgan pending allaqachon bekor hisoblanadi
+        q &= ~Q(status=BookingStatus.PENDING, expires_at__lt=now)
+    return q
+
+
+def starts_after_q(moment):
+    # booking (date, time) moment dan keyin boshlanadi
+    local = timezone.localtime(moment)
+    return Q(date__gt=local.date()) | Q(date=local.date(), time__gte=local.time())
+
+
+def client_confirm_q(now):
+    return starts_after_q(now + timedelta(minutes=CLIENT_CONFIRM_CUTOFF_MINUTES))
+
+
+def _after_transition(target, booking_id, master_id, booking_date, booking_time):
+    # UPDATE post_save bermaydi: snapshot invalidatsiyasi va SSE event shu yerda
+    if target not in ACTIVE_STATUSES:
+        availability_cache.invalidate(master_id, booking_date)
+    publish_on_commit(booking_event("booking.status", booking_id, master_id, target, booking_date, booking_time))
+
+
+def transition(booking_id, target, now=None, condition=None, **fields):
+    """
+    Compare-and-set: booking_id ni target holatga o'tkazadi, agar joriy holat
+    TRANSITIONS bo'yicha ruxsat etilgan bo'lsa (va condition Q bajarilsa).
+    Muvaffaqiyatli bo'lsa True qaytaradi.
+    """
+    if now is None:
+        now = timezone.now()
+
+    q = transition_q(target, now)
+    if condition is not None:
+        q &= condition
+
+    updated = Booking.objects.filter(q, id=booking_id).update(status=target, updated_at=now, **fields)
+    if updated:
+        row = Booking.objects.filter(id=booking_id).values_list('master_id', 'date', 'time').first()
+        if row:
+            _after_transition(target, booking_id, *row)
+    return bool(updated)
+
+
+def effective_status(status, expires_at, now=None):
+    if status == BookingStatus.PENDING and expires_at < (now or timezone.now()):
+        return BookingStatus.CANCELLED
+    return status
+
+
+def effective_status_expression(now=None):
+    # effective_status ning SQL varianti (.values() / export uchun)
+    return Case(
+        When(status=BookingStatus.PENDING, expires_at__lt=now or timezone.now(), then=Value(BookingStatus.CANCELLED)),
+        default=F('status'),
+    )
+
+
+def bulk_master_action(master_id, actions, now=None):
+    """
+    actions: [{"booking_id", "status", "reason"}, ...]
+    Har bir maqsad holat uchun shartga mos qatorlar (status va muddat WHERE da)
+    SELECT ... FOR UPDATE bilan olinadi va bitta UPDATE qilinadi, so'ng javob
+    uchun bitta SELECT. {booking_id: outcome} qaytaradi.
+    """
+    if now is None:
+        now = timezone.now()
+
+    by_status = {}
+    for action in actions:
+        by_status.setdefault(action['status'], []).append(action)
+
+    with transaction.atomic():
+        # compare-and-set: shartga mos qatorlar FOR UPDATE bilan qulflanadi va
+        # UPDATE faqat shu id larga; muvaffaqiyat shu id lardan olinadi, qayta o'qishdan emas
+        applied = {}
+        for target, items in by_status.items():
+            ids = list(Booking.objects.select_for_update().filter(
+                transition_q(target, now),
+                id__in=[item['booking_id'] for item in items],
+                master_id=master_id,
+            ).values_list('id', flat=True))
+            if not ids:
+                continue
+
+            fields = {'status': target, 'updated_at': now}
+            if target == BookingStatus.REJECTED:
+                fields['reject_reason'] = Case(
+                    *[When(id=item['booking_id'], then=Value(item.get('reason'))) for item in items],
+                    output_field=TextField(),
+                )
+            Booking.objects.filter(id__in=ids).update(**fields)
+            applied.update((booking_id, target) for booking_id in ids)
+
+        rows = {
+            row['id']: row
+            for row in Booking.objects.filter(
+                id__in=[action['booking_id'] for action in actions],
+                master_id=master_id,
+            ).values('id', 'status', 'date', 'time', 'expires_at')
+        }
+
+        for booking_id, target in applied.items():
+            row = rows[booking_id]
+            _after_transition(target, booking_id, master_id, row['date'], row['time'])
+
+        results = {}
+        for action in actions:
+            row = rows.get(action['booking_id'])
+            if row is None:
+                results[action['booking_id']] = {"success": False, "error": "not_found"}
+            elif applied.get(row['id']) == action['status']:
+                results[action['booking_id']] = {"success": True, "status": action['status']}
+            else:
+                results[action['booking_id']] = {
+                    "success": False,
+                    "error": "invalid_transition",
+                    "status": effective_status(row['status'], row['expires_at'], now),
+                }
+
+    return results
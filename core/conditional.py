@@ -0,0 +1,37 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+
+# master list/detail uchun weak ETag va If-None-Match -> 304.
+# ETag serializerdan oldin, master qatori va version stamplardan hisoblanadi.
+
+
+def master_row_stamp(master):
+    values = [getattr(master, field.attname) for field in master._meta.concrete_fields]
+    location = getattr(master, 'master_location', None)
+    if location is not None:
+        values += [getattr(location, field.attname) for field in location._meta.concrete_fields]
+    return values
+
+
+def weak_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # weak taqqoslash: W/ prefiksi hisobga olinmaydi
+    opaque = etag.removeprefix('W/')
+    return any(tag == '*' or tag.removeprefix('W/') == opaque for tag in parse_etags(header))
+
+
+# oddiy Django response: DRF view ham, async view ham qaytara oladi
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
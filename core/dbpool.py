@@ -0,0 +1,60 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+# psycopg_pool statistikasi (settings.DB_POOL=1 bo'lsa). Instrumentation hook:
+# settings.DB_POOL_STATS_HOOK (dotted path) har DB_POOL_STATS_INTERVAL soniyada
+# request_finished dan hook(alias, stats) ko'rinishida chaqiriladi. stats -
+# psycopg_pool get_stats(): pool_size, pool_available, requests_waiting,
+# requests_num, requests_wait_ms, connections_num, ... (hisoblagichlar oxirgi
+# hisobotdan beri).
+
+_lock = threading.Lock()
+_last_report = 0.0
+
+
+def get_pool(alias="default"):
+    # pool faqat postgresql backendda va OPTIONS["pool"] berilganda bo'ladi
+    return getattr(connections[alias], "pool", None)
+
+
+def get_pool_stats(alias="default", reset=False):
+    pool = get_pool(alias)
+    if pool is None:
+        return None
+    return pool.pop_stats() if reset else pool.get_stats()
+
+
+def log_pool_stats(alias, stats):
+    logger.info("db pool %s: %s", alias, " ".join(f"{key}={value}" for key, value in sorted(stats.items())))
+
+
+def report_pool_stats(now=None):
+    global _last_report
+    interval = settings.DB_POOL_STATS_INTERVAL
+    if not interval:
+        return
+
+    now = time.monotonic() if now is None else now
+    with _lock:
+        if now - _last_report < interval:
+            return
+        _last_report = now
+
+    hook = import_string(settings.DB_POOL_STATS_HOOK)
+    for alias in connections:
+        stats = get_pool_stats(alias, reset=True)
+        if stats is not None:
+            try:
+                hook(alias, stats)
+            except Exception:
+                # monitoring xatosi so'rovni buzmasin
+                logger.exception("db pool stats hook failed")
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+# booking o'zgarishlari uchun pub/sub (SSE stream: /api/bookings/events/).
+# Broker interfeysi:
+#   publish(event)                         - sync, commit dan keyin chaqiriladi
+#   listen(last_event_id, heartbeat)       - async generator: (event_id, event) yoki
+#                                            heartbeat vaqtida hech narsa bo'lmasa None
+
+
+class InProcessBroker:
+    """
+    Bitta process ichida: eventlar ring bufferda saqlanadi (Last-Event-ID bilan
+    davom ettirish uchun). Bir nechta node/worker bo'lsa RedisStreamBroker kerak.
+    """
+
+    def __init__(self, buffer_size=1000, queue_size=1000):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+
+    def publish(self, event):
+        with self._lock:
+            self._seq += 1
+            item = (str(self._seq), event)
+            self._buffer.append(item)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(subscriber.deliver, item)
+
+    async def listen(self, last_event_id=None, heartbeat=15):
+        subscriber = _Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            # obuna va backlog bitta lock ostida: orada event yo'qolmaydi
+            backlog = []
+            if last_event_id and last_event_id.isdigit():
+                backlog = [item for item in self._buffer if int(item[0]) > int(last_event_id)]
+
+        try:
+            for item in backlog:
+                yield item
+            while not subscriber.overflowed:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield item
+            # sekin klient: stream yopiladi, klient Last-Event-ID bilan qayta ulanadi
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+class _Subscriber:
+    def __init__(self, loop, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class RedisStreamBroker:
+    """
+    Bir nechta node uchun: Redis Stream (XADD/XREAD). Event id = stream id,
+    shuning uchun Last-Event-ID istalgan node da ishlaydi. `redis` paketi kerak.
+    """
+
+    def __init__(self, url=None, stream="timey:booking-events", maxlen=10000):
+        import redis
+
+        self.url = url or settings.REDIS_URL
+        self.stream = stream
+        self.maxlen = maxlen
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, event):
+        self.client.xadd(self.stream, {"data": json.dumps(event)}, maxlen=self.maxlen, approximate=True)
+
+    async def listen(self, last_event_id=None, heartbeat=15):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        cursor = last_event_id or "$"
+        try:
+            while True:
+                response = await client.xread({self.stream: cursor}, block=int(heartbeat * 1000), count=100)
+                if not response:
+                    yield None
+                    continue
+                for _, entries in response:
+                    for entry_id, fields in entries:
+                        cursor = entry_id
+                        yield entry_id.decode(), json.loads(fields[b"data"])
+        finally:
+            await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, "BOOKING_EVENTS_BROKER", "core.events.InProcessBroker"))()
+    return _broker
+
+
+def _publish(event):
+    try:
+        get_broker().publish(event)
+    except Exception:
+        # event yo'qolsa ham booking amali buzilmasin
+        logger.exception("booking event publish failed")
+
+
+def booking_event(event_type, booking_id, master_id, status, booking_date=None, booking_time=None):
+    return {
+        "type": event_type,
+        "booking_id": booking_id,
+        "master_id": master_id,
+        "status": str(status),
+        "date": booking_date.isoformat() if booking_date else None,
+        "time": booking_time.strftime("%H:%M") if booking_time else None,
+    }
+
+
+def publish_on_commit(event):
+    transaction.on_commit(lambda: _publish(event))
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import jwt
+
+
+# testlar va lokal yuklama uchun Eskiz API ning soddalashtirilgan nusxasi
+# (auth/login, message/sms/send, message/sms/send-batch)
+class FakeEskizServer:
+    def __init__(self, host="127.0.0.1", port=0, max_batch_size=200, latency=0.0):
+        self.max_batch_size = max_batch_size
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.tokens = set()
+        self.requests = []  # [(path, payload), ...]
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def sent_messages(self):
+        with self.lock:
+            messages = []
+            for path, payload in self.requests:
+                if path.endswith("/send-batch"):
+                    messages.extend(payload["messages"])
+                elif path.endswith("/send"):
+                    messages.append({"to": payload["mobile_phone"], "text": payload["message"]})
+            return messages
+
+    def expire_tokens(self):
+        with self.lock:
+            self.tokens.clear()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_payload(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    return json.loads(raw or "{}")
+                return dict(parse_qsl(raw))
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = self._read_payload()
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if self.path == "/api/auth/login":
+                    token = jwt.encode({"exp": int(time.time()) + 30 * 24 * 3600, "jti": uuid.uuid4().hex}, "fake")
+                    with server.lock:
+                        server.logins += 1
+                        server.tokens.add(token)
+                    return self._reply(200, {"message": "token_generated", "data": {"token": token}})
+
+                token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                with server.lock:
+                    authorized = token in server.tokens
+                if not authorized:
+                    return self._reply(401, {"status": "error", "message": "Expired"})
+
+                if self.path == "/api/message/sms/send":
+                    with server.lock:
+                        server.requests.append((self.path, payload))
+                    return self._reply(200, {"id": uuid.uuid4().hex, "status": "success", "message": "Waiting for SMS provider"})
+
+                if self.path == "/api/message/sms/send-batch":
+                    if len(payload.get("messages", [])) > server.max_batch_size:
+                        return self._reply(422, {"status": "error", "message": "Too many messages"})
+                    with server.lock:
+                        server.requests.append((self.path, payload))
+                    return self._reply(200, {"id": uuid.uuid4().hex, "status": "waiting", "message": "Waiting for SMS provider"})
+
+                return self._reply(404, {"status": "error", "message": "Not found"})
+
+        return Handler
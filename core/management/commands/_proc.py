@@ -0,0 +1,48 @@
+import os
+
+
+# Linux /proc orqali server processlari xotirasi (bench_http, bench_startup uchun)
+
+
+def child_pids(pid):
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    return children.get(pid, [])
+
+
+def memory(pid):
+    """
+    {"rss", "pss", "private"} bytes da. pss - bo'lishilgan sahifalar process
+    soniga bo'lingan, private - faqat shu processniki (copy-on-write dan keyin).
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0]) * 1024
+    except OSError:
+        return {"rss": 0, "pss": 0, "private": 0}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+# pid va uning barcha bola processlari RSS yig'indisi (bytes)
+def tree_rss(pid):
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(child_pids(current))
+        total += memory(current)["rss"]
+    return total
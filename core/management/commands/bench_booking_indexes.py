@@ -0,0 +1,144 @@
+import random
+import statistics
+import time as timer
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Booking, BookingStatus
+from core.utils import active_bookings_q
+
+
+SLOTS_PER_DAY = 132  # 09:00 - 20:00, 5 daqiqalik
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Booking indekslari uchun benchmark: jadvalga --rows ta booking yozadi, "
+        "hot query larni indekslar bilan va indekssiz o'lchaydi, so'ng hammasini rollback qiladi. "
+        "Faqat dev/staging bazada ishlating (DROP INDEX jadvalni lock qiladi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--masters", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"], options["masters"], options["batch_size"])
+                self.analyze()
+
+                queries = self.queries(options["masters"])
+                after = self.measure(queries, options["repeat"])
+
+                with connection.cursor() as cursor:
+                    for index in Booking._meta.indexes:
+                        cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+                self.analyze()
+                before = self.measure(queries, options["repeat"])
+
+                self.report(queries, before, after)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("rollback: seed qatorlari va indeks o'zgarishlari bekor qilindi")
+
+    def seed(self, rows, masters, batch_size):
+        rng = random.Random(42)
+        today = timezone.localdate()
+        start = today - timedelta(days=180)
+        per_master = max(1, rows // masters)
+        statuses = (
+            [BookingStatus.COMPLETED] * 50 + [BookingStatus.CANCELLED] * 20
+            + [BookingStatus.CONFIRMED] * 12 + [BookingStatus.ACCEPTED] * 8
+            + [BookingStatus.PENDING] * 6 + [BookingStatus.REJECTED] * 4
+        )
+
+        started = timer.perf_counter()
+        batch = []
+        for i in range(rows):
+            master_id, k = i % masters + 1, i // masters
+            booking_date = start + timedelta(days=k * 365 // per_master)
+            minutes = 9 * 60 + (k * 7 + master_id) % SLOTS_PER_DAY * 5
+            booking_time = time(minutes // 60, minutes % 60)
+            expires_at = timezone.make_aware(datetime.combine(booking_date, booking_time)) + timedelta(minutes=15)
+            batch.append(Booking(
+                user_id=rng.randint(1, 200_000),
+                master_id=master_id,
+                service_type="barber",
+                date=booking_date,
+                time=booking_time,
+                status=rng.choice(statuses),
+                expires_at=expires_at,
+            ))
+            if len(batch) >= batch_size:
+                Booking.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Booking.objects.bulk_create(batch)
+
+        # auto_now_add hammasiga bir xil vaqt qo'yadi, realroq taqsimot uchun
+        Booking.objects.update(created_at=F("expires_at") - timedelta(days=3))
+        self.stdout.write(f"seeded {rows} bookings in {timer.perf_counter() - started:.1f}s")
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Booking._meta.db_table}")
+
+    def queries(self, masters):
+        today = timezone.localdate()
+        page_master_ids = list(range(1, min(masters, 50) + 1))
+        return {
+            # get_masters_availability: sahifadagi 50 master uchun bugungi band vaqtlar
+            "availability (50 masters)": Booking.objects.filter(
+                active_bookings_q(), master_id__in=page_master_ids, date=today
+            ).values_list("master_id", "time"),
+            # get_free_slots: bitta master snapshoti
+            "free slots (1 master)": Booking.objects.filter(
+                active_bookings_q(), master_id=7, date=today
+            ).values_list("time", flat=True),
+            # expire_bookings sweeper batch
+            "expiry sweep batch": Booking.objects.filter(
+                status=BookingStatus.PENDING, expires_at__lt=timezone.now()
+            ).order_by("expires_at").values_list("id", flat=True)[:1000],
+            # BookingListAPIView?master_id=... birinchi sahifa
+            "list master": Booking.objects.filter(
+                master_id=7
+            ).order_by("-created_at", "-id")[:21],
+            # BookingListAPIView?master_id=...&status=pending birinchi sahifa
+            "list master+pending": Booking.objects.filter(
+                master_id=7, status=BookingStatus.PENDING
+            ).order_by("-created_at", "-id")[:21],
+            # BookingListAPIView filtersiz birinchi sahifa
+            "list first page": Booking.objects.order_by("-created_at", "-id")[:21],
+        }
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = timer.perf_counter()
+                list(queryset.all())
+                timings.append((timer.perf_counter() - started) * 1000)
+            results[name] = (statistics.median(timings), plan)
+        return results
+
+    def report(self, queries, before, after):
+        self.stdout.write(f"\n{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for name in queries:
+            before_ms, after_ms = before[name][0], after[name][0]
+            self.stdout.write(f"{name:<28}{before_ms:>12.2f}{after_ms:>12.3f}{before_ms / after_ms:>9.0f}x")
+
+        for name in queries:
+            self.stdout.write(f"\n== {name}\n-- before:\n{before[name][1]}\n-- after:\n{after[name][1]}")
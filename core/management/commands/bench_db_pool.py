@@ -0,0 +1,96 @@
+import threading
+import time as timer
+
+import psycopg
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from core.dbpool import get_pool_stats
+from core.models import Master
+
+
+class Command(BaseCommand):
+    help = (
+        "DB ga burst: --threads ta thread har biri --requests ta 'so'rov' bajaradi "
+        "(ORM query + pg_sleep, oxirida close_old_connections - request tugagandagi kabi). "
+        "Shu vaqtda pg_stat_activity dagi ulanishlar soni kuzatiladi. "
+        "DB_POOL=1 bilan va usiz ishga tushirib solishtiring (faqat PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--sleep-ms", type=float, default=5)
+        parser.add_argument("--sample-ms", type=float, default=20)
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "postgresql":
+            raise CommandError("faqat PostgreSQL uchun")
+
+        settings_dict = connection.settings_dict
+        pool_options = settings_dict["OPTIONS"].get("pool")
+        mode = f"pool {pool_options}" if pool_options else f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}"
+
+        # kuzatuvchi ulanish pooldan tashqarida, o'zi hisobga kirmaydi
+        monitor = psycopg.connect(**{
+            key: value for key, value in {
+                "dbname": settings_dict["NAME"],
+                "user": settings_dict["USER"],
+                "password": settings_dict["PASSWORD"],
+                "host": settings_dict["HOST"],
+                "port": settings_dict["PORT"],
+            }.items() if value
+        }, autocommit=True)
+
+        def backends():
+            return monitor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND backend_type = 'client backend' AND pid <> pg_backend_pid()"
+            ).fetchone()[0]
+
+        baseline = backends()
+        errors = []
+        threads = [
+            threading.Thread(target=self.client, args=(options["requests"], options["sleep_ms"] / 1000, errors))
+            for _ in range(options["threads"])
+        ]
+
+        start = timer.perf_counter()
+        for thread in threads:
+            thread.start()
+        samples = []
+        while any(thread.is_alive() for thread in threads):
+            samples.append(backends())
+            timer.sleep(options["sample_ms"] / 1000)
+        elapsed = timer.perf_counter() - start
+        after = backends()
+
+        done = options["threads"] * options["requests"] - len(errors)
+        self.stdout.write(f"mode: {mode}")
+        self.stdout.write(
+            f"threads={options['threads']} requests={done} errors={len(errors)} "
+            f"elapsed={elapsed:.2f}s rps={done / elapsed:.1f}"
+        )
+        self.stdout.write(
+            f"connections: before={baseline} peak={max(samples, default=after)} "
+            f"mean={sum(samples) / max(len(samples), 1):.1f} after={after}"
+        )
+        stats = get_pool_stats()
+        if stats is not None:
+            self.stdout.write("pool: " + " ".join(f"{key}={value}" for key, value in sorted(stats.items())))
+        monitor.close()
+
+    def client(self, requests, sleep, errors):
+        try:
+            for _ in range(requests):
+                try:
+                    Master.objects.filter(id=1).exists()
+                    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                        cursor.execute("SELECT pg_sleep(%s)", [sleep])
+                except Exception as exc:
+                    errors.append(type(exc).__name__)
+                finally:
+                    close_old_connections()
+        finally:
+            connections.close_all()
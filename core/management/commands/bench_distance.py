@@ -0,0 +1,43 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from core import utils
+
+
+class Command(BaseCommand):
+    help = "calculate_distance_km (scalar) va batch haversine tezligini solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=3000)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--k", type=int, default=20)
+
+    def handle(self, *args, **options):
+        points, repeat, k = options["points"], options["repeat"], options["k"]
+
+        rng = random.Random(42)
+        lat, lng = 41.3111, 69.2797  # Toshkent markazi
+        lats = [lat + rng.uniform(-0.3, 0.3) for _ in range(points)]
+        lngs = [lng + rng.uniform(-0.3, 0.3) for _ in range(points)]
+
+        cases = {
+            "scalar loop": lambda: [
+                utils.calculate_distance_km(lat, lng, other_lat, other_lng)
+                for other_lat, other_lng in zip(lats, lngs)
+            ],
+            "batch python": lambda: utils._distances_km_python(lat, lng, lats, lngs),
+            f"nearest_k(k={k})": lambda: utils.nearest_k(lat, lng, lats, lngs, k),
+        }
+        if utils.np is not None:
+            cases["batch numpy"] = lambda: utils._distances_km_numpy(lat, lng, lats, lngs)
+        else:
+            self.stdout.write("numpy o'rnatilmagan, faqat pure-Python fallback o'lchanadi")
+
+        self.stdout.write(f"points={points} repeat={repeat}")
+        baseline = None
+        for name, func in cases.items():
+            seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+            baseline = baseline or seconds
+            self.stdout.write(f"{name:<18} {seconds * 1e6:>10.1f} us  x{baseline / seconds:.1f}")
@@ -0,0 +1,194 @@
+import asyncio
+import random
+import statistics
+import time as timer
+from datetime import time, timedelta
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import slots as slot_bitmap
+from core.models import Booking, BookingStatus, Master, MasterAvailability, MasterWeeklySchedule
+
+from core.management.commands._proc import tree_rss
+
+
+BENCH_PREFIX = "bench-"
+DEFAULT_PATHS = (
+    "/masters/list/?size=20",
+    "/masters/{id}/",
+    "/masters/{id}/next-available-time/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Ishlab turgan serverga keep-alive ulanishlar bilan parallel GET yuboradi va "
+        "RPS, p50/p99 hamda server process daraxtining RSS ini chiqaradi. "
+        "WSGI va ASGI ni bir xil xotirada solishtirish uchun bir xil worker soni bilan ishga tushiring:\n"
+        "  gunicorn timey.wsgi -w 4\n"
+        "  ASYNC_READ_VIEWS=1 gunicorn timey.asgi -w 4 -k uvicorn.workers.UvicornWorker\n"
+        "so'ng: manage.py bench_http --pid <gunicorn master pid>. "
+        "--seed va --cleanup bench- masterlarini yaratadi / o'chiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help="{id} bench masterlari bilan almashtiriladi (bir necha marta berish mumkin)")
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument("--warmup", type=float, default=2)
+        parser.add_argument("--pid", type=int, help="server master process pid, RSS o'lchash uchun (Linux /proc)")
+        parser.add_argument("--seed", type=int, default=0, help="shuncha bench masterini yaratadi va chiqadi")
+        parser.add_argument("--cleanup", action="store_true", help="bench masterlarini o'chiradi va chiqadi")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self.cleanup()
+            return
+        if options["seed"]:
+            self.seed(options["seed"])
+            return
+
+        ids = list(Master.objects.filter(full_name__startswith=BENCH_PREFIX).values_list("id", flat=True))
+        paths = options["paths"] or list(DEFAULT_PATHS)
+        if not ids and any("{id}" in path for path in paths):
+            raise CommandError("bench masterlari yo'q: avval --seed N bilan yarating")
+
+        rng = random.Random(42)
+        targets = [path.format(id=rng.choice(ids)) if "{id}" in path else path for _ in range(100) for path in paths]
+
+        url = urlsplit(options["url"])
+        host, port = url.hostname, url.port or 80
+        asyncio.run(self.load(host, port, targets, options["concurrency"], options["warmup"], record=False))
+        latencies, errors, rss = asyncio.run(
+            self.load(host, port, targets, options["concurrency"], options["duration"], pid=options["pid"])
+        )
+        self.report(options, latencies, errors, rss)
+
+    async def load(self, host, port, targets, concurrency, duration, pid=None, record=True):
+        deadline = timer.perf_counter() + duration
+        latencies, errors = [], []
+        workers = [
+            asyncio.create_task(self.worker(host, port, targets[i::concurrency] or targets, deadline, latencies, errors))
+            for i in range(concurrency)
+        ]
+
+        rss = []
+        while pid and not all(w.done() for w in workers):
+            rss.append(tree_rss(pid))
+            await asyncio.sleep(0.5)
+        await asyncio.gather(*workers)
+        return (latencies, errors, max(rss, default=None)) if record else None
+
+    async def worker(self, host, port, targets, deadline, latencies, errors):
+        reader = writer = None
+        i = 0
+        while timer.perf_counter() < deadline:
+            path = targets[i % len(targets)]
+            i += 1
+            start = timer.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                status, keep_alive = await _get(reader, writer, host, path)
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                errors.append(type(exc).__name__)
+                writer = _close(writer)
+                continue
+
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append(timer.perf_counter() - start)
+            if not keep_alive:
+                writer = _close(writer)
+        _close(writer)
+
+    def report(self, options, latencies, errors, rss):
+        count = len(latencies)
+        self.stdout.write(f"url={options['url']} concurrency={options['concurrency']} duration={options['duration']}s")
+        if not count:
+            self.stdout.write(f"muvaffaqiyatli javob yo'q, errors={len(errors)}")
+            return
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        line = (
+            f"requests={count} errors={len(errors)} rps={count / options['duration']:.1f} "
+            f"p50={quantiles[49] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms"
+        )
+        if rss is not None:
+            line += f" rss={rss / 1024 / 1024:.1f}MB"
+        self.stdout.write(line)
+
+    def seed(self, count):
+        today = timezone.localdate()
+        slots = [f"{h:02d}:{m:02d}" for h in range(9, 21) for m in (0, 30)]
+        mask = slot_bitmap.encode_slots(slots)
+        bitmap = slot_bitmap.to_bytes(mask)
+        start = Master.objects.filter(full_name__startswith=BENCH_PREFIX).count()
+
+        masters = Master.objects.bulk_create(
+            Master(full_name=f"{BENCH_PREFIX}{i}", phone=f"+998000{i:06d}", experience_years=i % 20, rating=i % 50 / 10)
+            for i in range(start, start + count)
+        )
+        for offset in range(7):
+            MasterAvailability.objects.bulk_create(
+                MasterAvailability(master=m, date=today + timedelta(days=offset), available_slots=slots,
+                                   slots_bitmap=bitmap, slots_count=mask.bit_count())
+                for m in masters
+            )
+        # shablon bitmap i save() da hisoblanadi
+        for m in masters:
+            for weekday in range(7):
+                MasterWeeklySchedule.objects.create(master=m, weekday=weekday, start_time=time(9, 0), end_time=time(18, 0))
+        Booking.objects.bulk_create(
+            Booking(user_id=1, master_id=m.id, service_type="barber", date=today + timedelta(days=offset),
+                    time=time(9 + n, 0), status=BookingStatus.ACCEPTED, expires_at=timezone.now())
+            for m in masters for offset in range(7) for n in range(4)
+        )
+        self.stdout.write(f"seeded masters={len(masters)}")
+
+    def cleanup(self):
+        ids = list(Master.objects.filter(full_name__startswith=BENCH_PREFIX).values_list("id", flat=True))
+        Booking.objects.filter(master_id__in=ids).delete()
+        deleted, _ = Master.objects.filter(id__in=ids).delete()
+        self.stdout.write(f"deleted={deleted}")
+
+
+async def _get(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n".encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ValueError("connection closed")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.read()
+        return int(status_line.split()[1]), False
+
+    return int(status_line.split()[1]), headers.get("connection") != "close"
+
+
+def _close(writer):
+    if writer is not None:
+        writer.close()
+    return None
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+import time as timer
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands._proc import child_pids, memory
+
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "gunicorn.conf.py bilan serverni ishga tushirib, startdan birinchi muvaffaqiyatli "
+        "javobgacha vaqtni va --requests ta so'rovdan keyin har bir worker RSS/PSS/private "
+        "xotirasini o'lchaydi. --compare preload+gc.freeze ni GUNICORN_PRELOAD=0 bilan solishtiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--path", default="/masters/list/?size=20")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--timeout", type=float, default=60)
+        parser.add_argument("--compare", action="store_true")
+
+    def handle(self, *args, **options):
+        variants = [("preload", {"GUNICORN_PRELOAD": "1"})]
+        if options["compare"]:
+            variants.append(("no-preload", {"GUNICORN_PRELOAD": "0"}))
+
+        for name, env in variants:
+            self.measure(name, env, options)
+
+    def measure(self, name, extra_env, options):
+        url = f"http://127.0.0.1:{options['port']}{options['path']}"
+        env = {
+            **os.environ,
+            **extra_env,
+            "PORT": str(options["port"]),
+            "WEB_CONCURRENCY": str(options["workers"]),
+            "GUNICORN_MAX_REQUESTS": "0",  # o'lchov davomida worker almashmasin
+        }
+
+        start = timer.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", str(settings.BASE_DIR / "gunicorn.conf.py")],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            first_response = self.wait_first_response(url, server, start + options["timeout"]) - start
+            for _ in range(options["requests"]):
+                urlopen(url).read()
+
+            master = memory(server.pid)
+            workers = [memory(pid) for pid in child_pids(server.pid)]
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        self.stdout.write(f"{name}: first_response={first_response * 1000:.0f}ms master_rss={master['rss'] / MB:.1f}MB")
+        for i, mem in enumerate(workers):
+            self.stdout.write(
+                f"  worker {i}: rss={mem['rss'] / MB:.1f}MB pss={mem['pss'] / MB:.1f}MB private={mem['private'] / MB:.1f}MB"
+            )
+        total_pss = master["pss"] + sum(mem["pss"] for mem in workers)
+        self.stdout.write(f"  total_pss={total_pss / MB:.1f}MB")
+
+    def wait_first_response(self, url, server, deadline):
+        while timer.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"gunicorn to'xtadi (exit code {server.returncode})")
+            try:
+                urlopen(url, timeout=5).read()
+                return timer.perf_counter()
+            except (URLError, ConnectionError):
+                timer.sleep(0.01)
+        raise CommandError("server --timeout ichida javob bermadi")
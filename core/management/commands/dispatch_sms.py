@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.outbox import dispatch_once
+
+
+class Command(BaseCommand):
+    help = "SmsOutbox navbatidagi SMS larni Eskiz orqali parallel yuboradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--workers", type=int, default=8, help="parallel HTTP so'rovlar soni")
+        parser.add_argument("--loop", action="store_true", help="to'xtamasdan navbatni kuzatadi")
+        parser.add_argument("--interval", type=float, default=1, help="navbat bo'sh bo'lsa kutish (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            claimed = dispatch_once(batch_size=options["batch_size"], workers=options["workers"])
+            if claimed or not options["loop"]:
+                self.stdout.write(f"dispatched={claimed}")
+
+            if not options["loop"]:
+                break
+            if not claimed:
+                time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.utils import cancel_expired_bookings
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan pending bookinglarni batch-batch cancelled qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", action="store_true", help="to'xtamasdan har --interval soniyada ishlaydi")
+        parser.add_argument("--interval", type=float, default=60)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        while True:
+            close_old_connections()
+            cancelled = cancel_expired_bookings(batch_size=batch_size)
+            if cancelled or not options["loop"]:
+                self.stdout.write(f"cancelled={cancelled}")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
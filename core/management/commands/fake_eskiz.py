@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.fake_eskiz import FakeEskizServer
+
+
+class Command(BaseCommand):
+    help = "Lokal fake Eskiz server (ESKIZ_BASE_URL=http://127.0.0.1:<port>/api bilan ishlating)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--max-batch-size", type=int, default=200)
+        parser.add_argument("--latency", type=float, default=0.0, help="har so'rovga qo'shimcha kechikish (soniya)")
+
+    def handle(self, *args, **options):
+        server = FakeEskizServer(
+            host=options["host"],
+            port=options["port"],
+            max_batch_size=options["max_batch_size"],
+            latency=options["latency"],
+        )
+        self.stdout.write(f"fake Eskiz: {server.base_url}")
+        with server:
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(f"logins={server.logins} messages={len(server.sent_messages())}")
@@ -0,0 +1,30 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.otp import prune_otps
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan OTP qatorlarini (DB store) batch-batch o'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24, help="expires_at dan shuncha soat o'tganlarini o'chiradi")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", action="store_true", help="to'xtamasdan har --interval soniyada ishlaydi")
+        parser.add_argument("--interval", type=float, default=3600)
+
+    def handle(self, *args, **options):
+        older_than = timedelta(hours=options["hours"])
+
+        while True:
+            close_old_connections()
+            deleted = prune_otps(older_than=older_than, batch_size=options["batch_size"])
+            if deleted or not options["loop"]:
+                self.stdout.write(f"deleted={deleted}")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
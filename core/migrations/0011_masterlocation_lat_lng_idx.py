@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_remove_guestprofile_city_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='masterlocation',
+            index=models.Index(fields=['lat', 'lng'], name='masterlocation_lat_lng_idx'),
+        ),
+    ]
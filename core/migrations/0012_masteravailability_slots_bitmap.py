@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+from core import slots as slot_bitmap
+
+
+def fill_slots_bitmap(apps, schema_editor):
+    MasterAvailability = apps.get_model('core', 'MasterAvailability')
+
+    batch = []
+    for availability in MasterAvailability.objects.only('id', 'available_slots').iterator(chunk_size=1000):
+        mask = slot_bitmap.encode_slots(availability.available_slots, strict=False)
+        availability.slots_bitmap = slot_bitmap.to_bytes(mask)
+        batch.append(availability)
+        if len(batch) >= 1000:
+            MasterAvailability.objects.bulk_update(batch, ['slots_bitmap'])
+            batch = []
+    if batch:
+        MasterAvailability.objects.bulk_update(batch, ['slots_bitmap'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_masterlocation_lat_lng_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='masteravailability',
+            name='slots_bitmap',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(fill_slots_bitmap, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+ACTIVE_STATUSES = ['pending', 'accepted', 'confirmed']
+
+
+def cancel_duplicate_active_bookings(apps, schema_editor):
+    # constraint qo'shishdan oldin bir slotdagi ortiqcha aktiv bookinglarni bekor qilamiz,
+    # eng birinchi yaratilgani qoladi
+    Booking = apps.get_model('core', 'Booking')
+
+    duplicates = (
+        Booking.objects.filter(status__in=ACTIVE_STATUSES)
+        .values('master_id', 'date', 'time')
+        .annotate(n=models.Count('id'))
+        .filter(n__gt=1)
+    )
+    for slot in duplicates:
+        ids = list(
+            Booking.objects.filter(status__in=ACTIVE_STATUSES, **{k: slot[k] for k in ('master_id', 'date', 'time')})
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+        )
+        Booking.objects.filter(id__in=ids[1:]).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_masteravailability_slots_bitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_active_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'accepted', 'confirmed'])), fields=('master_id', 'date', 'time'), name='booking_active_slot_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_otp_attempts_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='masteravailability',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_masteravailability_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MasterWeeklySchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('breaks', models.JSONField(blank=True, default=list)),
+                ('discount_percent', models.PositiveIntegerField(default=0)),
+                ('slots_bitmap', models.BinaryField(default=bytes)),
+                ('slots_count', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('master', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_schedule', to='core.master')),
+            ],
+            options={
+                'unique_together': {('master', 'weekday')},
+            },
+        ),
+    ]
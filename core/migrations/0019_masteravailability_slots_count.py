@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+from core import slots as slot_bitmap
+
+
+def fill_slots_count(apps, schema_editor):
+    MasterAvailability = apps.get_model('core', 'MasterAvailability')
+
+    batch = []
+    for availability in MasterAvailability.objects.only('id', 'slots_bitmap').iterator(chunk_size=1000):
+        availability.slots_count = slot_bitmap.from_bytes(availability.slots_bitmap).bit_count()
+        batch.append(availability)
+        if len(batch) >= 1000:
+            MasterAvailability.objects.bulk_update(batch, ['slots_count'])
+            batch = []
+    if batch:
+        MasterAvailability.objects.bulk_update(batch, ['slots_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_masterweeklyschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='masteravailability',
+            name='slots_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_slots_count, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.conf import settings
+from core import slots as slot_bitmap
 # Create your models here.
 
 User = get_user_model()
@@ -54,6 +55,36 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # bitta master/date/time uchun faqat bitta aktiv booking (double booking yo'q)
+            models.UniqueConstraint(
+                fields=['master_id', 'date', 'time'],
+                condition=models.Q(status__in=['pending', 'accepted', 'confirmed']),
+                name='booking_active_slot_unique',
+            ),
+        ]
+        # availability query lari (master_id, date, aktiv status) ni
+        # booking_active_slot_unique partial indeksi qoplaydi
+        indexes = [
+            # expire_bookings sweeper: status='pending' AND expires_at < now
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='pending'),
+                name='booking_pending_expires_idx',
+            ),
+            # booking list keyset: (created_at, id), master_id bo'yicha yoki filtersiz
+            models.Index(fields=['master_id', 'created_at', 'id'], name='booking_master_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+        ]
+
+    @property
+    def effective_status(self):
+        # sweeper hali yetib kelmagan bo'lsa ham muddati o'tgan pending = cancelled
+        if self.status == BookingStatus.PENDING and self.expires_at and self.expires_at < timezone.now():
+            return BookingStatus.CANCELLED
+        return self.status
+
     def save(self, *args, **kwargs):
         if not self.pk:
             dt = datetime.combine(self.date, self.time)          # 2026-02-05 23:00
@@ -116,6 +147,12 @@ class MasterLocation(models.Model):
     place_id = models.CharField(max_length=255)
     accuracy = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            # "yaqin masterlar" bounding box qidiruvi uchun
+            models.Index(fields=['lat', 'lng'], name='masterlocation_lat_lng_idx'),
+        ]
+
 
 class MasterAvailability(models.Model):
     master = models.ForeignKey(
@@ -125,9 +162,12 @@ class MasterAvailability(models.Model):
     )
     date = models.DateField()
     available_slots = models.JSONField()  # mavjud bo'lgan vaqt slotlari ro'yxati
+    slots_bitmap = models.BinaryField(default=bytes)  # available_slots ning bitmap ko'rinishi
+    slots_count = models.PositiveSmallIntegerField(default=0)  # bitmapdagi slotlar soni, only_available DB filtri uchun
     discount_percent = models.PositiveIntegerField(default=0)  # chegirma foizi
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag version stamp
 
     class Meta:
         unique_together = ('master', 'date')
@@ -135,12 +175,85 @@ class MasterAvailability(models.Model):
     def __str__(self):
         return f"{self.master.full_name} - {self.date}"
 
+    @property
+    def slots_mask(self):
+        return slot_bitmap.from_bytes(self.slots_bitmap)
+
+    def save(self, *args, **kwargs):
+        mask = slot_bitmap.encode_slots(self.available_slots, strict=False)
+        self.slots_bitmap = slot_bitmap.to_bytes(mask)
+        self.slots_count = mask.bit_count()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            extra = {'updated_at'}
+            if 'available_slots' in update_fields:
+                extra.update(('slots_bitmap', 'slots_count'))
+            kwargs['update_fields'] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
 
 
 
 
 
 
+class MasterWeeklySchedule(models.Model):
+    """
+    Haftalik jadval shabloni: shu hafta kuni uchun MasterAvailability qatori
+    bo'lmasa, availability shu shablondan hisoblanadi (qator bo'lsa, qator ustun).
+    """
+    WEEKDAYS = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+
+    master = models.ForeignKey(
+        Master,
+        on_delete=models.CASCADE,
+        related_name='weekly_schedule'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)  # date.weekday()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    breaks = models.JSONField(default=list, blank=True)  # [{"start": "13:00", "end": "14:00"}, ...]
+    discount_percent = models.PositiveIntegerField(default=0)
+
+    slots_bitmap = models.BinaryField(default=bytes)  # shablondan hisoblangan slotlar
+    slots_count = models.PositiveSmallIntegerField(default=0)  # only_available DB filtri uchun
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('master', 'weekday')
+
+    def __str__(self):
+        return f"{self.master_id} - {self.get_weekday_display()}"
+
+    @property
+    def slots_mask(self):
+        return slot_bitmap.from_bytes(self.slots_bitmap)
+
+    def save(self, *args, **kwargs):
+        mask = slot_bitmap.schedule_mask(
+            self.start_time,
+            self.end_time,
+            self.slot_minutes,
+            [(b['start'], b['end']) for b in self.breaks or []],
+        )
+        self.slots_bitmap = slot_bitmap.to_bytes(mask)
+        self.slots_count = mask.bit_count()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'slots_bitmap', 'slots_count', 'updated_at'}
+        super().save(*args, **kwargs)
+
+
 class OTP(models.Model):
     phone = models.CharField(max_length=20, db_index=True)
     code = models.CharField(max_length=6)
@@ -148,11 +261,61 @@ class OTP(models.Model):
     expires_at = models.DateTimeField()
     resend_available_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # send/verify: telefon bo'yicha oxirgi ishlatilmagan kod
+            models.Index(
+                fields=['phone', '-created_at'],
+                name='otp_phone_unused_idx',
+                condition=models.Q(is_used=False),
+            ),
+            # prune_otps
+            models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ]
 
     def is_expired(self) -> bool:
         return timezone.now() >= self.expires_at
 
 
+class SmsStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    SENDING = 'sending', 'Sending'
+    SENT = 'sent', 'Sent'
+    SKIPPED = 'skipped', 'Skipped'
+    FAILED = 'failed', 'Failed'
+
+
+class SmsOutbox(models.Model):
+    # view SMS ni shu yerga yozadi, dispatch_sms worker Eskiz orqali yuboradi
+    phone = models.CharField(max_length=20)
+    text = models.TextField()
+    status = models.CharField(max_length=10, choices=SmsStatus.choices, default=SmsStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    response = models.JSONField(null=True, blank=True)
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True, blank=True)  # shundan keyin yuborish ma'nosiz (masalan OTP)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # dispatcher navbati: pending/sending qatorlar next_attempt_at bo'yicha
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status__in=['pending', 'sending']),
+                name='smsoutbox_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.phone} - {self.status}"
+
+
 class GuestProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="guest_profile")
 
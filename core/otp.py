@@ -0,0 +1,167 @@
+import hmac
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import OTP
+
+
+OTP_EXPIRES_SECONDS = 120
+OTP_RESEND_AFTER_SECONDS = 60
+OTP_MAX_ATTEMPTS = 5
+OTP_EXPIRED_GRACE_SECONDS = 10 * 60  # shu vaqt davomida "Code expired" deb javob beramiz
+
+VERIFIED = "verified"
+INVALID = "invalid"
+EXPIRED = "expired"
+LOCKED = "locked"
+
+
+def generate_otp_code() -> str:
+    return f"{random.randint(0, 999999):06d}"
+
+
+class DatabaseOTPStore:
+    """OTP jadvali orqali (bitta node, cache yo'q bo'lsa)."""
+
+    def issue(self, phone, code, now=None):
+        """
+        Yangi kod saqlaydi va 0 qaytaradi.
+        Resend oynasi hali yopilmagan bo'lsa kutish soniyalarini qaytaradi.
+        """
+        if now is None:
+            now = timezone.now()
+
+        last_otp = OTP.objects.filter(phone=phone, is_used=False).order_by("-created_at").first()
+        if last_otp and now < last_otp.resend_available_at:
+            return max(1, int((last_otp.resend_available_at - now).total_seconds()))
+
+        OTP.objects.create(
+            phone=phone,
+            code=code,
+            expires_at=now + timedelta(seconds=OTP_EXPIRES_SECONDS),
+            resend_available_at=now + timedelta(seconds=OTP_RESEND_AFTER_SECONDS),
+        )
+        return 0
+
+    def verify(self, phone, code, now=None):
+        # transaction.atomic ichida chaqirilishi kerak (select_for_update)
+        if now is None:
+            now = timezone.now()
+
+        otp = (
+            OTP.objects
+            .select_for_update()
+            .filter(phone=phone, is_used=False)
+            .order_by("-created_at")
+            .first()
+        )
+        if not otp:
+            return INVALID
+        if otp.attempts >= OTP_MAX_ATTEMPTS:
+            return LOCKED
+        if not hmac.compare_digest(otp.code, code):
+            OTP.objects.filter(pk=otp.pk).update(attempts=F("attempts") + 1)
+            return INVALID
+        if now >= otp.expires_at:
+            return EXPIRED
+
+        otp.is_used = True
+        otp.save(update_fields=["is_used"])
+        return VERIFIED
+
+
+class CacheOTPStore:
+    """
+    Django cache orqali: TTL lar bilan expiry va resend oynasi, atomik urinishlar hisoblagichi.
+    Bir nechta node uchun umumiy backend (Redis) kerak, bitta node da LocMemCache yetarli.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _keys(self, phone):
+        return f"otp:{phone}:code", f"otp:{phone}:resend", f"otp:{phone}:attempts"
+
+    def issue(self, phone, code, now=None):
+        code_key, resend_key, attempts_key = self._keys(phone)
+        now_ts = now.timestamp() if now else time.time()
+
+        # add() atomik: parallel so'rovlardan faqat bittasi oynani ochadi
+        if not self.cache.add(resend_key, now_ts + OTP_RESEND_AFTER_SECONDS, timeout=OTP_RESEND_AFTER_SECONDS):
+            resend_at = self.cache.get(resend_key)
+            return max(1, int(resend_at - now_ts)) if resend_at else 1
+
+        self.cache.set(
+            code_key,
+            {"code": code, "expires_at": now_ts + OTP_EXPIRES_SECONDS},
+            timeout=OTP_EXPIRES_SECONDS + OTP_EXPIRED_GRACE_SECONDS,
+        )
+        self.cache.delete(attempts_key)
+        return 0
+
+    def verify(self, phone, code, now=None):
+        code_key, resend_key, attempts_key = self._keys(phone)
+        now_ts = now.timestamp() if now else time.time()
+
+        data = self.cache.get(code_key)
+        if not data:
+            return INVALID
+
+        self.cache.add(attempts_key, 0, timeout=OTP_EXPIRES_SECONDS + OTP_EXPIRED_GRACE_SECONDS)
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            attempts = 1
+        if attempts > OTP_MAX_ATTEMPTS:
+            return LOCKED
+
+        if not hmac.compare_digest(data["code"], code):
+            return INVALID
+        if now_ts >= data["expires_at"]:
+            return EXPIRED
+
+        # delete() True qaytargan so'rovgina kodni ishlatadi (parallel verify dan himoya)
+        if not self.cache.delete(code_key):
+            return INVALID
+        self.cache.delete(attempts_key)
+        return VERIFIED
+
+
+_store = None
+
+
+def get_otp_store():
+    global _store
+    if _store is None:
+        if getattr(settings, "OTP_STORE", "db") == "cache":
+            _store = CacheOTPStore(getattr(settings, "OTP_CACHE_ALIAS", "default"))
+        else:
+            _store = DatabaseOTPStore()
+    return _store
+
+
+# eski/ishlatilgan OTP qatorlarini batch-batch o'chiradi (prune_otps command)
+def prune_otps(older_than=timedelta(days=1), batch_size=1000, now=None):
+    if now is None:
+        now = timezone.now()
+    cutoff = now - older_than
+
+    deleted = 0
+    while True:
+        ids = list(OTP.objects.filter(expires_at__lt=cutoff).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += OTP.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            break
+    return deleted
@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import SmsOutbox, SmsStatus
+from core.sms import eskiz_send_sms
+
+
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 10
+CLAIM_TIMEOUT_SECONDS = 5 * 60  # worker yiqilsa "sending" qator shundan keyin qayta olinadi
+BACKGROUND_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+# SMS ni navbatga qo'yadi; chaqiruvchi transaction ichida bo'lsa, birga commit bo'ladi.
+# settings.SMS_DISPATCH:
+#   "background" (default) - commitdan keyin shu processdagi fon threadi yuboradi, javob kutmaydi
+#   "worker" - faqat navbatga yoziladi, dispatch_sms --loop yuboradi
+#   "inline" - commitdan keyin so'rov threadining o'zida yuboriladi (faqat dev uchun)
+def enqueue_sms(phone, text, expires_at=None):
+    row = SmsOutbox.objects.create(phone=phone, text=text, expires_at=expires_at)
+    mode = getattr(settings, "SMS_DISPATCH", "background")
+    if mode == "background":
+        transaction.on_commit(lambda: send_in_background(row.id))
+    elif mode == "inline":
+        transaction.on_commit(lambda: send_now(row.id))
+    return row
+
+
+def claim_batch(limit, now=None, ids=None):
+    """
+    Yuborishga tayyor qatorlarni SELECT ... FOR UPDATE SKIP LOCKED bilan olib,
+    "sending" qiladi. Parallel workerlar bir xil qatorni olmaydi.
+    """
+    if now is None:
+        now = timezone.now()
+
+    queryset = SmsOutbox.objects.select_for_update(skip_locked=True).filter(
+        Q(status=SmsStatus.PENDING)
+        | Q(status=SmsStatus.SENDING, claimed_at__lt=now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS)),
+        next_attempt_at__lte=now,
+    )
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+
+    with transaction.atomic():
+        rows = list(queryset.order_by('next_attempt_at', 'id')[:limit])
+        if rows:
+            SmsOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                status=SmsStatus.SENDING,
+                claimed_at=now,
+            )
+    for row in rows:
+        row.status, row.claimed_at = SmsStatus.SENDING, now
+    return rows
+
+
+def _send(row):
+    if row.expires_at and row.expires_at <= timezone.now():
+        return {"sent": False, "error": "expired"}
+    return eskiz_send_sms(row.phone, row.text)
+
+
+def record_result(row, result, now=None):
+    if now is None:
+        now = timezone.now()
+
+    attempts = row.attempts + 1
+    fields = {"attempts": attempts, "response": result, "claimed_at": None}
+
+    if result.get("sent"):
+        fields.update(status=SmsStatus.SENT, sent_at=now, last_error="")
+    elif result.get("mode") == "dev":
+        fields.update(status=SmsStatus.SKIPPED, last_error="")
+    else:
+        fields["last_error"] = str(result.get("error") or result.get("data") or "")[:1000]
+        if result.get("error") == "expired" or attempts >= MAX_ATTEMPTS:
+            fields["status"] = SmsStatus.FAILED
+        else:
+            fields.update(
+                status=SmsStatus.PENDING,
+                next_attempt_at=now + timedelta(seconds=RETRY_BACKOFF_SECONDS * attempts),
+            )
+
+    # boshqa worker qatorni qayta olgan bo'lsa (claim timeout), natijani yozmaymiz
+    return SmsOutbox.objects.filter(
+        id=row.id, status=SmsStatus.SENDING, claimed_at=row.claimed_at
+    ).update(**fields)
+
+
+def dispatch_once(batch_size=50, workers=8):
+    """Bitta batch: claim -> parallel yuborish -> natijani yozish. Olingan qatorlar sonini qaytaradi."""
+    now = timezone.now()
+    rows = claim_batch(batch_size, now=now)
+    if not rows:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_send, rows))
+
+    for row, result in zip(rows, results):
+        record_result(row, result)
+    return len(rows)
+
+
+def send_now(row_id):
+    """
+    Bitta qatorni darhol yuboradi (inline / background rejim). Yuborilmasa qator backoff bilan
+    pending bo'lib qoladi: dispatch_sms ishlayotgan bo'lsa u qayta urinadi.
+    """
+    rows = claim_batch(1, ids=[row_id])
+    for row in rows:
+        record_result(row, _send(row))
+    return bool(rows)
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def _background_pool():
+    # fork dan keyin (gunicorn preload) har worker o'z poolini ochadi
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="sms")
+        return _background
+
+
+def _reset_background_pool():
+    global _background, _background_lock
+    _background, _background_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_background_pool)
+
+
+def _send_in_thread(row_id):
+    close_old_connections()
+    try:
+        send_now(row_id)
+    except Exception:
+        # qator pending/sending bo'lib qoladi, dispatch_sms ishlayotgan bo'lsa qayta oladi
+        logger.exception("background sms send failed: %s", row_id)
+    finally:
+        connection.close()
+
+
+def send_in_background(row_id):
+    """send_now ni fon threadida bajaradi (background rejim). Future qaytaradi."""
+    return _background_pool().submit(_send_in_thread, row_id)
+
+
+def shutdown_background(wait=True):
+    """Navbatdagi fon yuborishlarini tugatadi (worker to'xtashidan oldin)."""
+    global _background
+    with _background_lock:
+        pool, _background = _background, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
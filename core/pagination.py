@@ -0,0 +1,112 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+# keyset (cursor) pagination: OFFSET o'rniga oxirgi qatordan keyingisini oladi,
+# shuning uchun chuqur sahifalar ham 1-sahifa kabi arzon
+class KeysetPagination:
+    cursor_query_param = 'cursor'
+    size_query_param = 'size'
+    total_query_param = 'with_total'
+
+    def __init__(self, ordering, default_size=5, max_size=100):
+        # ordering: ('-rating', '-id') kabi, oxirgi maydon unique bo'lishi kerak
+        self.ordering = tuple(ordering)
+        self.fields = [f.lstrip('-') for f in self.ordering]
+        self.default_size = default_size
+        self.max_size = max_size
+
+    def get_size(self, request):
+        try:
+            size = int(_query_params(request).get(self.size_query_param, self.default_size))
+        except (TypeError, ValueError):
+            raise ValidationError({self.size_query_param: "Butun son bo'lishi kerak."})
+        return max(1, min(size, self.max_size))
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model=None):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise ValidationError({self.cursor_query_param: "Noto'g'ri cursor."})
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise ValidationError({self.cursor_query_param: "Noto'g'ri cursor."})
+        if model is not None:
+            values = self._to_python(values, model)
+        return values
+
+    def _to_python(self, values, model):
+        # cursor klientdan keladi: qiymatlar ordering maydonlari turiga mos bo'lishi kerak
+        converted = []
+        for field_name, value in zip(self.fields, values):
+            field = model._meta.get_field(field_name)
+            try:
+                if value is None or isinstance(value, (list, dict)):
+                    raise TypeError(value)
+                converted.append(field.to_python(value))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise ValidationError({self.cursor_query_param: "Noto'g'ri cursor."})
+        return converted
+
+    def cursor_filter(self, values):
+        # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), har maydon o'z yo'nalishida
+        condition = Q()
+        equal = Q()
+        for ordering, field, value in zip(self.ordering, self.fields, values):
+            lookup = 'lt' if ordering.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def page_querysets(self, queryset, request):
+        # (size, total uchun queryset | None, sahifa queryseti); query bajarilmaydi
+        params = _query_params(request)
+        size = self.get_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        total_queryset = queryset if params.get(self.total_query_param) == 'true' else None
+
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.cursor_filter(self.decode_cursor(cursor, queryset.model)))
+
+        return size, total_queryset, queryset[:size + 1]
+
+    def paginate_queryset(self, queryset, request):
+        """
+        (items, next_cursor, total) qaytaradi.
+        total faqat ?with_total=true bo'lsa hisoblanadi, aks holda None.
+        """
+        size, total_queryset, page = self.page_querysets(queryset, request)
+        total = total_queryset.count() if total_queryset is not None else None
+        return (*self.split_page(list(page), size), total)
+
+    async def apaginate_queryset(self, queryset, request):
+        size, total_queryset, page = self.page_querysets(queryset, request)
+        total = await total_queryset.acount() if total_queryset is not None else None
+        return (*self.split_page([obj async for obj in page], size), total)
+
+    def split_page(self, items, size):
+        # size + 1 ta qatordan: (sahifa, next_cursor | None)
+        next_cursor = None
+        if len(items) > size:
+            items = items[:size]
+            next_cursor = self.encode_cursor(items[-1])
+        return items, next_cursor
+
+
+def _query_params(request):
+    # DRF Request da query_params, oddiy Django (async) view da GET
+    return getattr(request, 'query_params', request.GET)
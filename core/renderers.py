@@ -0,0 +1,51 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class _EchoBuffer:
+    # csv.writer yozgan qatorni darhol qaytaradi (butun faylni xotirada saqlamaydi)
+    def write(self, value):
+        return value
+
+
+def _as_rows(data):
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return [data]
+    return data
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return "".join(self.stream(_as_rows(data))).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows, fields=None):
+        writer = csv.writer(_EchoBuffer())
+        if fields is not None:
+            yield writer.writerow(fields)
+        for row in rows:
+            if fields is None:
+                fields = list(row)
+                yield writer.writerow(fields)
+            yield writer.writerow([row.get(field) for field in fields])
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return "".join(self.stream(_as_rows(data))).encode(self.charset)
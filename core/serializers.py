@@ -1,9 +1,11 @@
 import re
+from collections import Counter
 from rest_framework import serializers
-from .models import Booking, Master, MasterLocation, MasterAvailability, GuestProfile
+from .models import Booking, Master, MasterLocation, MasterAvailability, MasterWeeklySchedule, GuestProfile
 from django.utils import timezone
 from datetime import datetime
-from core.utils import calculate_distance_km, get_master_availability
+from core.utils import calculate_distance_km, get_masters_availability
+from core import slots as slot_bitmap
 
 
 class EmptySerializer(serializers.Serializer):
@@ -26,16 +28,8 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if booking_datetime < timezone.now():
             raise serializers.ValidationError("Booking time cannot be in the past.")
 
-        # Ikki marta band qilishni oldini olish
-        master_id = data.get("master_id")
-        if Booking.objects.filter(
-            master_id=master_id,
-            date=date,
-            time=time,
-            status__in=["pending", "accepted", "confirmed"]
-        ).exists():
-            raise serializers.ValidationError("This time slot is already booked for the selected master.")
-
+        # Ikki marta band qilish booking_active_slot_unique constraint orqali
+        # INSERT paytida tekshiriladi (BookingCreateView 409 qaytaradi)
         return data
 
     def validate_time(self, value):
@@ -45,7 +39,7 @@ class BookingCreateSerializer(serializers.ModelSerializer):
 
 class BookingResponseSerializer(serializers.ModelSerializer):
     booking_id = serializers.IntegerField(source='id', read_only=True)
-    status = serializers.CharField(read_only=True)
+    status = serializers.CharField(source='effective_status', read_only=True)
     expires_at = serializers.DateTimeField(read_only=True, format="%Y-%m-%d %H:%M")
 
     class Meta:
@@ -62,7 +56,12 @@ class BookingMasterActionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = ['booking_id', 'status', 'reason']
+        extra_kwargs = {'status': {'required': True}}
 
+    def validate_status(self, value):
+        if value not in ('accepted', 'rejected'):
+            raise serializers.ValidationError("Master faqat accepted yoki rejected qilishi mumkin.")
+        return value
 
     def validate(self, attrs):
         status_value = attrs.get('status')
@@ -79,6 +78,28 @@ class BookingMasterActionSerializer(serializers.ModelSerializer):
         return data
 
 
+class BookingBulkActionItemSerializer(serializers.Serializer):
+    booking_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=['accepted', 'rejected'])
+    reason = serializers.CharField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if attrs['status'] == 'rejected' and not attrs.get('reason'):
+            raise serializers.ValidationError("Rejected qilganiz uchun sabab kiritishingiz kerak.")
+        return attrs
+
+
+class BookingBulkActionSerializer(serializers.Serializer): # master bir nechta bookingni birdan accept/reject qiladi
+    actions = BookingBulkActionItemSerializer(many=True, allow_empty=False, max_length=200)
+
+    def validate_actions(self, value):
+        counts = Counter(item['booking_id'] for item in value)
+        duplicates = sorted(booking_id for booking_id, n in counts.items() if n > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Booking id lar takrorlanmasligi kerak: {duplicates}")
+        return value
+
+
 class BookingClientConfirmSerializer(serializers.ModelSerializer):
     booking_id = serializers.IntegerField(read_only=True, source='id')
     status = serializers.CharField(read_only=True)
@@ -88,27 +109,7 @@ class BookingClientConfirmSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ['booking_id', 'status', 'client_confirmed']
 
-    def validate_client_confirmed(self, value):
-        booking = self.instance
-        if not booking:
-            raise serializers.ValidationError("Booking topilmadi.")
-
-        # Booking datetime ni yaratish
-        booking_datetime = datetime.combine(booking.date, booking.time)
-        if timezone.is_naive(booking_datetime):
-            booking_datetime = timezone.make_aware(booking_datetime, timezone.get_current_timezone())
-
-        now = timezone.localtime()  # Hozirgi vaqtni localtime bilan olish
-        time_diff = booking_datetime - now
-
-        if time_diff.total_seconds() < 0:
-            raise serializers.ValidationError("Bu buyurtma vaqti allaqachon o'tgan.")
-        # if time_diff.total_seconds() > 60 * 60:
-        #     raise serializers.ValidationError("Faqat buyurtmadan 60 daqiqa oldin tasdiqlashingiz mumkin.")
-        if time_diff.total_seconds() < 30 * 60:
-            raise serializers.ValidationError("Faqat buyurtmadan 30 daqiqa oldin tasdiqlashingiz mumkin.")
-
-        return value
+    # vaqt sharti (buyurtmadan 30 daqiqa oldin) UPDATE ning WHERE qismida: core/bookings.py
 
 
 
@@ -121,19 +122,7 @@ class BookingCompleteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
         fields = ['booking_id', 'status']
-
-    def validate(self, data):
-        booking = self.instance
-
-        if booking.status not in ['accepted', 'confirmed']:
-            raise serializers.ValidationError( "Faqat qabul qilingan yoki tasdiqlangan buyurtmani tugatish mumkin.")
-
-        return data
-
-    def update(self, instance, validated_data):
-        instance.status = 'completed'
-        instance.save()
-        return instance
+        # o'tish (accepted/confirmed -> completed) core/bookings.py dagi TRANSITIONS da
 
 
 
@@ -207,7 +196,31 @@ class MasterCreateSerializer(serializers.ModelSerializer): #master yaratish uchu
         return master
     
 
-class MasterListSerializer(serializers.ModelSerializer): #masterlarni filterlab olish uchun
+class MasterAvailabilityFieldsMixin:
+    """
+    discount_percent / is_available_today / next_available_time uchun
+    availability ni har bir master uchun bir marta hisoblaydi.
+    View context["availability"] ga {master_id: availability} ni bulk
+    hisoblab bersa, serializer qo'shimcha query qilmaydi.
+    """
+
+    def get_availability(self, obj):
+        availability_map = self.context.setdefault("availability", {})
+        if obj.id not in availability_map:
+            availability_map.update(get_masters_availability([obj]))
+        return availability_map[obj.id]
+
+    def get_discount_percent(self, obj):
+        return self.get_availability(obj)["discount_percent"]
+
+    def get_is_available_today(self, obj) -> bool:
+        return self.get_availability(obj)["is_available_today"]
+
+    def get_next_available_time(self, obj) -> str | None:
+        return self.get_availability(obj)["next_available_time"]
+
+
+class MasterListSerializer(MasterAvailabilityFieldsMixin, serializers.ModelSerializer): #masterlarni filterlab olish uchun
     master_location = MasterLocationSerializer(read_only=True)
     discount_percent = serializers.SerializerMethodField()
     is_available_today = serializers.SerializerMethodField()
@@ -234,23 +247,29 @@ class MasterListSerializer(serializers.ModelSerializer): #masterlarni filterlab
         )
         
     
-    # master mavjudligi uchun
-    def get_is_available_today(self, obj):
-        from core.utils import get_today_availability
-        return get_master_availability(obj)["is_available_today"]
-    
-    def get_next_available_time(self, obj):
-        from core.utils import get_today_availability
-        return get_master_availability(obj)["next_available_time"]
-    
-    def get_discount_percent(self, obj):
-        from core.utils import get_today_availability
-        return get_master_availability(obj)["discount_percent"]
-    
     def get_id(self, obj):
         return str(obj.id).zfill(5)  # ID ni 5 ta raqamga to'ldirish
 
 
+class NearbyMasterSerializer(MasterListSerializer): # yaqin masterlar uchun
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(MasterListSerializer.Meta):
+        fields = MasterListSerializer.Meta.fields + ('distance_km',)
+
+    def get_distance_km(self, obj) -> float | None:
+        return self.context.get("distances", {}).get(obj.id)
+
+
+class MasterAvailabilityListSerializer(serializers.ListSerializer): # bulk upsert uchun
+    def validate(self, attrs):
+        counts = Counter(item['date'] for item in attrs)
+        duplicates = sorted(d.isoformat() for d, n in counts.items() if n > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Sanalar takrorlanmasligi kerak: {', '.join(duplicates)}")
+        return attrs
+
+
 class MasterAvailabilitySerializer(serializers.ModelSerializer):
         class Meta:
             model = MasterAvailability
@@ -259,8 +278,68 @@ class MasterAvailabilitySerializer(serializers.ModelSerializer):
                 'available_slots',
                 'discount_percent',
             )
+            list_serializer_class = MasterAvailabilityListSerializer
+
+        def validate_available_slots(self, value):
+            if not isinstance(value, list) or not all(isinstance(slot, str) for slot in value):
+                raise serializers.ValidationError("available_slots \"HH:MM\" satrlar ro'yxati bo'lishi kerak.")
+            try:
+                mask = slot_bitmap.encode_slots(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+            return slot_bitmap.decode_slots(mask)  # tartiblangan, takrorlanmas
+
+class MasterWeeklyScheduleListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        counts = Counter(item['weekday'] for item in attrs)
+        duplicates = sorted(weekday for weekday, n in counts.items() if n > 1)
+        if duplicates:
+            raise serializers.ValidationError(f"Hafta kunlari takrorlanmasligi kerak: {duplicates}")
+        return attrs
+
+
+class MasterWeeklyScheduleSerializer(serializers.ModelSerializer): # haftalik jadval shabloni
+    start_time = serializers.TimeField(format="%H:%M", input_formats=["%H:%M"])
+    end_time = serializers.TimeField(format="%H:%M", input_formats=["%H:%M"])
+
+    class Meta:
+        model = MasterWeeklySchedule
+        fields = (
+            'weekday',
+            'start_time',
+            'end_time',
+            'slot_minutes',
+            'breaks',
+            'discount_percent',
+        )
+        list_serializer_class = MasterWeeklyScheduleListSerializer
+
+    def validate_breaks(self, value):
+        if not isinstance(value, list) or not all(
+            isinstance(b, dict) and isinstance(b.get('start'), str) and isinstance(b.get('end'), str)
+            for b in value
+        ):
+            raise serializers.ValidationError("breaks [{\"start\": \"HH:MM\", \"end\": \"HH:MM\"}] ko'rinishida bo'lishi kerak.")
+        return [{'start': b['start'], 'end': b['end']} for b in value]
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("start_time end_time dan oldin bo'lishi kerak.")
+        try:
+            mask = slot_bitmap.schedule_mask(
+                attrs['start_time'],
+                attrs['end_time'],
+                attrs.get('slot_minutes', 30),
+                [(b['start'], b['end']) for b in attrs.get('breaks', [])],
+            )
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        if not mask:
+            raise serializers.ValidationError("Jadvalda birorta ham slot yo'q.")
+        return attrs
 
-class MasterDetailSerializer(serializers.ModelSerializer): #master detail uchun
+
+class MasterDetailSerializer(MasterAvailabilityFieldsMixin, serializers.ModelSerializer): #master detail uchun
     master_location = MasterLocationSerializer(read_only=True)
     discount_percent = serializers.SerializerMethodField()
     is_available_today = serializers.SerializerMethodField()
@@ -286,15 +365,6 @@ class MasterDetailSerializer(serializers.ModelSerializer): #master detail uchun
             'next_available_time',
         )
 
-    def get_discount_percent(self, obj):
-        return get_master_availability(obj)["discount_percent"]
-
-    def get_is_available_today(self, obj)-> bool:
-        return get_master_availability(obj)["is_available_today"]
-
-    def get_next_available_time(self, obj) -> str | None:
-        return get_master_availability(obj)["next_available_time"]
-
     def get_id(self, obj):
         return str(obj.id).zfill(5)
 
@@ -0,0 +1,39 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import availability_cache, dbpool
+from core.events import booking_event, publish_on_commit
+from core.models import Booking, MasterAvailability, MasterWeeklySchedule
+
+
+# booking yoki jadval o'zgarsa (master, date) availability snapshoti eskiradi.
+# QuerySet.update() / bulk_create signal bermaydi - u yerlarda
+# availability_cache.invalidate() ni qo'lda chaqiring
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=MasterAvailability)
+@receiver(post_delete, sender=MasterAvailability)
+def invalidate_availability(sender, instance, **kwargs):
+    availability_cache.invalidate(instance.master_id, instance.date)
+
+
+# SSE stream uchun (transition() va sweeper UPDATE lari eventni o'zi yuboradi)
+@receiver(post_save, sender=Booking)
+def publish_booking_saved(sender, instance, created, **kwargs):
+    publish_on_commit(booking_event(
+        "booking.created" if created else "booking.updated",
+        instance.id, instance.master_id, instance.status, instance.date, instance.time,
+    ))
+
+
+@receiver(post_save, sender=MasterWeeklySchedule)
+@receiver(post_delete, sender=MasterWeeklySchedule)
+def invalidate_master_availability(sender, instance, **kwargs):
+    availability_cache.invalidate_master(instance.master_id)
+
+
+# DB pool statistikasi (interval bo'yicha, core/dbpool.py)
+@receiver(request_finished)
+def report_db_pool_stats(sender, **kwargs):
+    dbpool.report_pool_stats()
@@ -0,0 +1,134 @@
+from datetime import time
+
+
+# kunni SLOT_MINUTES qadamli bitmap sifatida ifodalash:
+# i-bit = 00:00 dan i * SLOT_MINUTES daqiqa o'tgan vaqt (5 daqiqa => 288 bit, 36 bayt)
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = (SLOTS_PER_DAY + 7) // 8
+FULL_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+
+def slot_index(value):
+    """
+    "HH:MM", "HH:MM:SS" yoki time ni bit indeksiga aylantiradi.
+    Vaqt SLOT_MINUTES to'riga tushmasa None qaytaradi.
+    """
+    if isinstance(value, time):
+        hours, minutes, seconds = value.hour, value.minute, value.second
+    else:
+        try:
+            parts = [int(part) for part in str(value).split(':')]
+        except ValueError:
+            raise ValueError(f"Noto'g'ri vaqt: {value!r}")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Noto'g'ri vaqt: {value!r}")
+        hours, minutes = parts[0], parts[1]
+        seconds = parts[2] if len(parts) == 3 else 0
+        if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+            raise ValueError(f"Noto'g'ri vaqt: {value!r}")
+
+    if seconds or minutes % SLOT_MINUTES:
+        return None
+    return (hours * 60 + minutes) // SLOT_MINUTES
+
+
+def slot_label(index):
+    minutes = index * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def encode_slots(slots, strict=True):
+    """
+    ["10:00", "10:30", ...] -> bitmap (int).
+    strict=True bo'lsa noto'g'ri yoki to'rga tushmaydigan slot ValueError beradi,
+    aks holda tashlab yuboriladi.
+    """
+    mask = 0
+    for slot in slots or []:
+        try:
+            index = slot_index(slot)
+        except ValueError:
+            if strict:
+                raise
+            continue
+        if index is None:
+            if strict:
+                raise ValueError(f"Slot {SLOT_MINUTES} daqiqalik to'rga tushishi kerak: {slot!r}")
+            continue
+        mask |= 1 << index
+    return mask
+
+
+def encode_times(times):
+    # booking vaqtlari -> bitmap; to'rga tushmagan vaqt hech qaysi slotni band qilmaydi
+    mask = 0
+    for value in times:
+        index = slot_index(value)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+def decode_slots(mask):
+    slots = []
+    while mask:
+        low = mask & -mask
+        slots.append(slot_label(low.bit_length() - 1))
+        mask ^= low
+    return slots
+
+
+def first_slot(mask):
+    # find-first-set: eng erta bo'sh slot
+    if not mask:
+        return None
+    return slot_label((mask & -mask).bit_length() - 1)
+
+
+def _minutes(value):
+    index = slot_index(value)
+    if index is None:
+        raise ValueError(f"Vaqt {SLOT_MINUTES} daqiqalik to'rga tushishi kerak: {value!r}")
+    return index * SLOT_MINUTES
+
+
+def schedule_mask(start, end, step_minutes, breaks=()):
+    """
+    Haftalik shablon -> bitmap: start dan boshlab har step_minutes da slot,
+    slot end dan oshmasligi va (break_start, break_end) tanaffuslarga tegmasligi kerak.
+    """
+    if step_minutes <= 0 or step_minutes % SLOT_MINUTES:
+        raise ValueError(f"Slot uzunligi {SLOT_MINUTES} ga karrali bo'lishi kerak: {step_minutes}")
+
+    start_minutes, end_minutes = _minutes(start), _minutes(end)
+    busy = [(_minutes(break_start), _minutes(break_end)) for break_start, break_end in breaks]
+
+    mask = 0
+    minutes = start_minutes
+    while minutes + step_minutes <= end_minutes:
+        if not any(minutes < busy_end and minutes + step_minutes > busy_start for busy_start, busy_end in busy):
+            mask |= 1 << (minutes // SLOT_MINUTES)
+        minutes += step_minutes
+    return mask
+
+
+def upcoming_mask(current):
+    # bugun uchun: current (time) dan oldin boshlanadigan slotlar o'chirilgan mask
+    minutes = current.hour * 60 + current.minute + (1 if current.second or current.microsecond else 0)
+    first = -(-minutes // SLOT_MINUTES)
+    return FULL_DAY_MASK & ~((1 << first) - 1)
+
+
+def free_mask(schedule_mask, booked_mask):
+    return schedule_mask & ~booked_mask
+
+
+def to_bytes(mask):
+    return mask.to_bytes(BITMAP_BYTES, 'big')
+
+
+def from_bytes(value):
+    if not value:
+        return 0
+    return int.from_bytes(bytes(value), 'big')
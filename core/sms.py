@@ -1,13 +1,86 @@
 import os
+import threading
+import time
+
+import jwt
 import requests
+from requests.adapters import HTTPAdapter
 
-ESKIZ_BASE = "https://notify.eskiz.uz/api"
+ESKIZ_BASE = os.getenv("ESKIZ_BASE_URL", "https://notify.eskiz.uz/api")
+ESKIZ_BATCH_SIZE = int(os.getenv("ESKIZ_BATCH_SIZE", "200"))  # send-batch dagi max xabarlar soni
+ESKIZ_TIMEOUT = (5, 20)  # (connect, read) soniya
+ESKIZ_POOL_SIZE = int(os.getenv("ESKIZ_POOL_SIZE", "10"))
+TOKEN_REFRESH_MARGIN = 60 * 60  # token tugashidan 1 soat oldin yangilaymiz
+TOKEN_DEFAULT_TTL = 29 * 24 * 60 * 60  # exp o'qib bo'lmasa (Eskiz token 30 kun)
 
 
 class EskizError(Exception):
     pass
 
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Eskiz uchun umumiy keep-alive session (connection pool bilan).
+    Har bir SMS uchun yangi TCP/TLS ulanish ochilmaydi.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ESKIZ_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _token_expires_at(token: str) -> float:
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    return float(exp) if exp else time.time() + TOKEN_DEFAULT_TTL
+
+
+class EskizTokenManager:
+    """
+    Eskiz bearer tokenini tugash vaqtigacha keshlaydi.
+    Yangilash lock ostida bir marta bajariladi (parallel login bo'lmaydi).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - TOKEN_REFRESH_MARGIN
+
+    def get_token(self) -> str:
+        if self._is_fresh():
+            return self._token
+        with self._lock:
+            if not self._is_fresh():
+                token = eskiz_get_token()
+                self._token, self._expires_at = token, _token_expires_at(token)
+            return self._token
+
+    def invalidate(self, token: str) -> None:
+        # faqat eskirgan token tashlanadi, boshqa thread yangilagani saqlanadi
+        with self._lock:
+            if self._token == token:
+                self._token = None
+                self._expires_at = 0.0
+
+
+token_manager = EskizTokenManager()
+
+
 def eskiz_get_token() -> str:
     email = os.getenv("ESKIZ_EMAIL")
     secret = os.getenv("ESKIZ_SECRET_KEY")
@@ -15,10 +88,10 @@ def eskiz_get_token() -> str:
     if not email or not secret:
         raise EskizError("ESKIZ_EMAIL yoki ESKIZ_SECRET_KEY yo‘q")
 
-    r = requests.post(
+    r = get_session().post(
         f"{ESKIZ_BASE}/auth/login",
         data={"email": email, "password": secret},
-        timeout=20,
+        timeout=ESKIZ_TIMEOUT,
     )
 
     try:
@@ -35,6 +108,29 @@ def eskiz_get_token() -> str:
     return token
 
 
+def _authorized_post(path: str, **kwargs) -> requests.Response:
+    # token keshdan olinadi; 401 bo'lsa yangilab bir marta qayta yuboramiz
+    for attempt in range(2):
+        token = token_manager.get_token()
+        r = get_session().post(
+            f"{ESKIZ_BASE}{path}",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=ESKIZ_TIMEOUT,
+            **kwargs,
+        )
+        if r.status_code != 401:
+            break
+        token_manager.invalidate(token)
+    return r
+
+
+def _response_data(r: requests.Response) -> dict:
+    try:
+        return r.json()
+    except Exception:
+        return {"raw_text": r.text[:500]}
+
+
 def eskiz_send_sms(phone: str, text: str) -> dict:
     """
     Hech qachon serverni yiqitmaydi:
@@ -48,26 +144,14 @@ def eskiz_send_sms(phone: str, text: str) -> dict:
         return {"sent": False, "mode": "dev", "message": "DEV_OTP_MODE=1, SMS not sent"}
 
     try:
-        token = eskiz_get_token()
-
-        headers = {"Authorization": f"Bearer {token}"}
         payload = {
             "mobile_phone": phone.replace("+", ""),
             "message": text,
             "from": os.getenv("ESKIZ_FROM", "4546"),
         }
 
-        r = requests.post(
-            f"{ESKIZ_BASE}/message/sms/send",
-            data=payload,
-            headers=headers,
-            timeout=20,
-        )
-
-        try:
-            data = r.json()
-        except Exception:
-            data = {"raw_text": r.text[:500]}
+        r = _authorized_post("/message/sms/send", data=payload)
+        data = _response_data(r)
 
         ok = (r.status_code == 200) and (data.get("status") == "success")
         return {"sent": ok, "status_code": r.status_code, "data": data}
@@ -75,3 +159,61 @@ def eskiz_send_sms(phone: str, text: str) -> dict:
     except Exception as e:
         # ✅ Eng muhim joy: exception tashlamaymiz
         return {"sent": False, "error": str(e)}
+
+
+def eskiz_send_sms_batch(messages, batch_size: int = None) -> list:
+    """
+    Ko'p SMS ni Eskiz send-batch orqali yuboradi.
+    messages: [(phone, text), ...]
+    Natija kirish tartibida: har bir xabar uchun eskiz_send_sms kabi dict
+    (+ user_sms_id). Hech qachon exception tashlamaydi.
+
+    send-batch javobi butun bo'lak uchun bitta: "sent" faqat Eskiz bo'lakni
+    qabul qilganini bildiradi va bo'lakdagi hamma xabarga bir xil natija
+    ko'chiriladi. Har bir user_sms_id yetkazilgani keyinroq Eskiz ning dispatch
+    status API si (dispatch_id bo'yicha) yoki callback orqali olinishi kerak.
+    """
+    from django.conf import settings
+
+    messages = list(messages)
+    if getattr(settings, "DEV_OTP_MODE", False):
+        return [{"sent": False, "mode": "dev", "message": "DEV_OTP_MODE=1, SMS not sent"} for _ in messages]
+
+    batch_size = batch_size or ESKIZ_BATCH_SIZE
+    dispatch_id = int(time.time() * 1000)
+    sender = os.getenv("ESKIZ_FROM", "4546")
+
+    results = [None] * len(messages)
+    prepared = []
+    for index, (phone, text) in enumerate(messages):
+        sms_id = f"{dispatch_id}-{index}"
+        to = str(phone).strip().replace("+", "")
+        if not to.isdigit():
+            results[index] = {"sent": False, "error": f"invalid phone: {phone}", "user_sms_id": sms_id}
+            continue
+        prepared.append((index, sms_id, int(to), text))
+
+    # provayder limiti bo'yicha bo'laklab yuboramiz
+    for start in range(0, len(prepared), batch_size):
+        chunk = prepared[start:start + batch_size]
+        payload = {
+            "messages": [
+                {"user_sms_id": sms_id, "to": to, "text": text}
+                for _, sms_id, to, text in chunk
+            ],
+            "from": sender,
+            "dispatch_id": dispatch_id,
+        }
+
+        try:
+            r = _authorized_post("/message/sms/send-batch", json=payload)
+            data = _response_data(r)
+            ok = r.status_code == 200 and data.get("status") in ("success", "waiting")
+            chunk_result = {"sent": ok, "status_code": r.status_code, "data": data}
+        except Exception as e:
+            chunk_result = {"sent": False, "error": str(e)}
+
+        for index, sms_id, _, _ in chunk:
+            results[index] = {**chunk_result, "user_sms_id": sms_id}
+
+    return results
@@ -1,3 +1,1079 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import threading
+from datetime import datetime, time, timedelta
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, AsyncRequestFactory, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from core import async_views, dbpool, events, otp, outbox, sms, slots as slot_bitmap, utils
+from core.bookings import bulk_master_action
+from core.pagination import KeysetPagination
+from core.serializers import MasterListSerializer
+from core.utils import filter_available_today, find_next_available, get_free_slots, get_masters_availability
+from core.fake_eskiz import FakeEskizServer
+from core.models import (
+    Booking, BookingStatus, Master, MasterAvailability, MasterLocation, MasterWeeklySchedule, SmsOutbox, SmsStatus,
+)
 
 # Create your tests here.
+
+
+class BookingDoubleBookingStressTest(TransactionTestCase):
+    THREADS = 24
+    ROUNDS = 5
+
+    def book_concurrently(self, payload):
+        barrier = threading.Barrier(self.THREADS)
+        status_codes = []
+        lock = threading.Lock()
+
+        def worker():
+            client = Client()
+            try:
+                barrier.wait()
+                response = client.post("/booking/", payload, content_type="application/json")
+                with lock:
+                    status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return status_codes
+
+    # sqlite in-memory test DB parallel yozuvlarda "table is locked" beradi,
+    # shuning uchun bu test PostgreSQL (DATABASE_URL) da ishlaydi
+    @skipIf(connection.vendor == "sqlite", "concurrent writes need PostgreSQL")
+    def test_concurrent_requests_never_double_book(self):
+        booking_date = timezone.localdate() + timedelta(days=1)
+
+        for round_no in range(self.ROUNDS):
+            payload = {
+                "user_id": 1,
+                "master_id": 7,
+                "service_type": "barber",
+                "date": booking_date.isoformat(),
+                "time": time(10 + round_no, 0).strftime("%H:%M"),
+                "payment_type": "cash",
+            }
+            status_codes = self.book_concurrently(payload)
+
+            self.assertEqual(len(status_codes), self.THREADS)
+            self.assertEqual(status_codes.count(201), 1, status_codes)
+            self.assertEqual(status_codes.count(409), self.THREADS - 1, status_codes)
+
+        active = Booking.objects.filter(
+            master_id=7,
+            status__in=[BookingStatus.PENDING, BookingStatus.ACCEPTED, BookingStatus.CONFIRMED],
+        )
+        self.assertEqual(active.count(), self.ROUNDS)
+        self.assertEqual(active.values("date", "time").distinct().count(), self.ROUNDS)
+
+    # sqlite da ham ishlaydi: ikkinchi INSERT constraint ga uriladi (parallel poyga bilan bir xil yo'l)
+    def test_second_request_for_same_slot_conflicts(self):
+        payload = {
+            "user_id": 1,
+            "master_id": 7,
+            "service_type": "barber",
+            "date": (timezone.localdate() + timedelta(days=1)).isoformat(),
+            "time": "10:00",
+            "payment_type": "cash",
+        }
+        first = Client().post("/booking/", payload, content_type="application/json")
+        second = Client().post("/booking/", {**payload, "user_id": 2}, content_type="application/json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()["detail"], "This time slot is already booked for the selected master.")
+        [active] = Booking.objects.filter(
+            master_id=7,
+            status__in=[BookingStatus.PENDING, BookingStatus.ACCEPTED, BookingStatus.CONFIRMED],
+        )
+        self.assertEqual((active.id, active.user_id), (first.json()["booking_id"], 1))
+
+    def test_expired_pending_slot_is_taken_over(self):
+        booking_date = timezone.localdate() + timedelta(days=1)
+        stale = Booking.objects.create(user_id=1, master_id=7, service_type="barber", date=booking_date, time=time(9, 0))
+        Booking.objects.filter(id=stale.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        response = Client().post("/booking/", {
+            "user_id": 2, "master_id": 7, "service_type": "barber",
+            "date": booking_date.isoformat(), "time": "09:00", "payment_type": "cash",
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, BookingStatus.CANCELLED)
+        self.assertEqual(
+            Booking.objects.filter(master_id=7, status=BookingStatus.PENDING).get().id,
+            response.json()["booking_id"],
+        )
+
+    def test_cancelled_slot_can_be_booked_again(self):
+        booking_date = timezone.localdate() + timedelta(days=1)
+        Booking(
+            user_id=1, master_id=7, service_type="barber",
+            date=booking_date, time=time(9, 0), status=BookingStatus.CANCELLED,
+        ).save()
+
+        response = Client().post("/booking/", {
+            "user_id": 2,
+            "master_id": 7,
+            "service_type": "barber",
+            "date": booking_date.isoformat(),
+            "time": "09:00",
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+
+
+@override_settings(DEV_OTP_MODE=False)
+class EskizBatchSmsTest(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeEskizServer(max_batch_size=200).start()
+        self.addCleanup(self.server.stop)
+
+        patches = [
+            mock.patch.object(sms, "ESKIZ_BASE", self.server.base_url),
+            mock.patch.object(sms, "token_manager", sms.EskizTokenManager()),
+            mock.patch.dict(os.environ, {"ESKIZ_EMAIL": "test@timey.uz", "ESKIZ_SECRET_KEY": "secret"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_batch_is_chunked_and_mapped_back_in_order(self):
+        messages = [(f"+99890{i:07d}", f"Salom {i}") for i in range(450)]
+        messages.insert(10, ("not-a-phone", "x"))
+
+        results = sms.eskiz_send_sms_batch(messages)
+
+        self.assertEqual(len(results), len(messages))
+        self.assertFalse(results[10]["sent"])
+        self.assertTrue(all(r["sent"] for i, r in enumerate(results) if i != 10))
+        self.assertEqual(len({r["user_sms_id"] for r in results}), len(messages))
+
+        batch_sizes = [len(payload["messages"]) for _, payload in self.server.requests]
+        self.assertEqual(batch_sizes, [200, 200, 50])
+        self.assertEqual(self.server.logins, 1)
+
+        sent = self.server.sent_messages()
+        self.assertEqual([m["text"] for m in sent], [text for i, (_, text) in enumerate(messages) if i != 10])
+
+    def test_expired_token_is_refreshed_once(self):
+        sms.eskiz_send_sms_batch([("+998901234567", "birinchi")])
+        self.server.expire_tokens()
+
+        results = sms.eskiz_send_sms_batch([("+998901234567", "ikkinchi")])
+
+        self.assertTrue(results[0]["sent"])
+        self.assertEqual(self.server.logins, 2)
+
+    def test_oversized_chunk_is_reported_per_message(self):
+        self.server.max_batch_size = 2
+        results = sms.eskiz_send_sms_batch(
+            [("+998901234567", "a"), ("+998901234568", "b"), ("+998901234569", "c")],
+            batch_size=3,
+        )
+
+        self.assertEqual([r["status_code"] for r in results], [422, 422, 422])
+        self.assertFalse(any(r["sent"] for r in results))
+
+
+@override_settings(SMS_DISPATCH="worker")
+class SmsOutboxTest(TestCase):
+    def setUp(self):
+        # navbatga yozilgan qatorlar (next_attempt_at=now) allaqachon yuborishga tayyor
+        self.now = timezone.now() + timedelta(seconds=1)
+
+    def claim(self, seconds=0):
+        return outbox.claim_batch(10, now=self.now + timedelta(seconds=seconds))
+
+    def test_failed_send_is_retried_with_backoff_then_failed(self):
+        row = outbox.enqueue_sms("+998901234567", "kod")
+        elapsed = 0
+        for attempt in range(1, outbox.MAX_ATTEMPTS + 1):
+            [claimed] = self.claim(elapsed)
+            self.assertEqual(outbox.record_result(claimed, {"sent": False, "error": "timeout"}, now=self.now + timedelta(seconds=elapsed)), 1)
+            row.refresh_from_db()
+            self.assertEqual(row.attempts, attempt)
+            if attempt < outbox.MAX_ATTEMPTS:
+                self.assertEqual(row.status, SmsStatus.PENDING)
+                backoff = outbox.RETRY_BACKOFF_SECONDS * attempt
+                self.assertEqual(row.next_attempt_at, self.now + timedelta(seconds=elapsed + backoff))
+                self.assertEqual(self.claim(elapsed + backoff - 1), [])
+                elapsed += backoff
+
+        self.assertEqual(row.status, SmsStatus.FAILED)
+        self.assertEqual(self.claim(3600), [])
+
+    def test_expired_message_fails_without_retry(self):
+        outbox.enqueue_sms("+998901234567", "kod", expires_at=self.now - timedelta(seconds=5))
+        [claimed] = self.claim()
+
+        outbox.record_result(claimed, outbox._send(claimed), now=self.now)
+
+        row = SmsOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts, row.last_error), (SmsStatus.FAILED, 1, "expired"))
+
+    def test_stale_claim_is_reclaimed(self):
+        outbox.enqueue_sms("+998901234567", "kod")
+        [stale] = self.claim()
+        self.assertEqual(self.claim(60), [])
+
+        [reclaimed] = self.claim(outbox.CLAIM_TIMEOUT_SECONDS + 1)
+        # eski worker kech javob bersa natijasi yozilmaydi
+        self.assertEqual(outbox.record_result(stale, {"sent": False, "error": "timeout"}), 0)
+        self.assertEqual(outbox.record_result(reclaimed, {"sent": True}), 1)
+        self.assertEqual(SmsOutbox.objects.get().status, SmsStatus.SENT)
+
+    @override_settings(SMS_DISPATCH="inline", DEV_OTP_MODE=True)
+    def test_inline_dispatch_sends_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.enqueue_sms("+998901234567", "kod")
+            self.assertEqual(SmsOutbox.objects.get().status, SmsStatus.PENDING)
+
+        row = SmsOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (SmsStatus.SKIPPED, 1))
+
+
+class SmsBackgroundDispatchTest(TransactionTestCase):
+    def test_default_dispatch_does_not_block_response(self):
+        self.assertEqual(settings.SMS_DISPATCH, "background")
+        started, release, sent = threading.Event(), threading.Event(), threading.Event()
+
+        def slow_eskiz(phone, text):
+            started.set()
+            release.wait(5)
+            sent.set()
+            return {"sent": True}
+
+        with mock.patch("core.outbox.eskiz_send_sms", side_effect=slow_eskiz):
+            try:
+                response = self.client.post("/api/auth/master/send-otp", {"phone": "+998901234567"},
+                                            content_type="application/json")
+                # javob qaytdi, Eskiz hali javob bermagan
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(sent.is_set())
+                self.assertTrue(started.wait(5))
+            finally:
+                release.set()
+                outbox.shutdown_background()
+
+        row = SmsOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts, row.phone), (SmsStatus.SENT, 1, "+998901234567"))
+
+
+class CacheOTPStoreTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = otp.CacheOTPStore()
+        self.now = timezone.now()
+
+    def test_resend_window_and_single_use(self):
+        self.assertEqual(self.store.issue("+998901234567", "123456", now=self.now), 0)
+        self.assertEqual(self.store.issue("+998901234567", "654321", now=self.now + timedelta(seconds=20)), 40)
+
+        self.assertEqual(self.store.verify("+998901234567", "654321", now=self.now), otp.INVALID)
+        self.assertEqual(self.store.verify("+998901234567", "123456", now=self.now), otp.VERIFIED)
+        self.assertEqual(self.store.verify("+998901234567", "123456", now=self.now), otp.INVALID)
+
+    def test_expired_code(self):
+        self.store.issue("+998901234567", "123456", now=self.now)
+        later = self.now + timedelta(seconds=otp.OTP_EXPIRES_SECONDS + 1)
+        self.assertEqual(self.store.verify("+998901234567", "123456", now=later), otp.EXPIRED)
+
+    def test_attempts_are_limited(self):
+        self.store.issue("+998901234567", "123456", now=self.now)
+        for _ in range(otp.OTP_MAX_ATTEMPTS):
+            self.assertEqual(self.store.verify("+998901234567", "000000", now=self.now), otp.INVALID)
+        self.assertEqual(self.store.verify("+998901234567", "123456", now=self.now), otp.LOCKED)
+
+
+@override_settings(AVAILABILITY_CACHE_SECONDS=300)
+class AvailabilitySnapshotCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.master = Master.objects.create(full_name="Usta", phone="+998901112233", experience_years=3)
+        MasterAvailability.objects.create(master=self.master, date=self.date, available_slots=["10:00", "11:00"])
+
+    def book(self, slot, **extra):
+        return Booking.objects.create(
+            user_id=1, master_id=self.master.id, service_type="barber",
+            date=self.date, time=slot, **extra,
+        )
+
+    def test_snapshot_is_cached_and_invalidated_by_saves(self):
+        self.assertEqual(get_free_slots(self.master, self.date), ["10:00", "11:00"])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_free_slots(self.master, self.date), ["10:00", "11:00"])
+
+        booking = self.book(time(10, 0), status=BookingStatus.ACCEPTED)
+        self.assertEqual(get_free_slots(self.master, self.date), ["11:00"])
+
+        booking.status = BookingStatus.CANCELLED
+        booking.save()
+        self.assertEqual(get_free_slots(self.master, self.date), ["10:00", "11:00"])
+
+        MasterAvailability.objects.filter(master=self.master).get().delete()
+        self.assertEqual(get_free_slots(self.master, self.date), [])
+
+    def test_snapshot_expires_with_pending_booking(self):
+        booking = self.book(time(10, 0))  # expires_at = date 10:15
+        self.assertEqual(get_free_slots(self.master, self.date), ["11:00"])
+
+        # sweeper .update() signal bermaydi: snapshot pending muddati bilan o'zi eskiradi
+        Booking.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        later = booking.expires_at + timedelta(minutes=1)
+        with mock.patch("time.time", return_value=later.timestamp()):
+            self.assertEqual(get_free_slots(self.master, self.date), ["10:00", "11:00"])
+
+
+class MasterListQueryCountTest(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.masters = [
+            Master.objects.create(full_name=f"Usta {i}", phone=f"+998901{i:06d}", experience_years=1, rating=i % 5)
+            for i in range(50)
+        ]
+        # hamma masterda shablon bor (aks holda shablon query si sahifa tarkibiga bog'liq), yarmida booking
+        for i, master in enumerate(self.masters):
+            MasterWeeklySchedule.objects.create(master=master, weekday=today.weekday(),
+                                                start_time=time(23, 45), end_time=time(23, 55), slot_minutes=5)
+            if i % 2:
+                Booking.objects.create(user_id=1, master_id=master.id, service_type="barber",
+                                       date=today, time=time(23, 45), status=BookingStatus.ACCEPTED)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), len(response.json()["results"])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        for url in ("/masters/list/?size={}", "/masters/list/?size={}&sort=rating&with_total=true",
+                    "/masters/list/?page=1&size={}"):
+            with self.subTest(url=url):
+                one, one_count = self.count_queries(url.format(1))
+                fifty, fifty_count = self.count_queries(url.format(50))
+                self.assertEqual((one_count, fifty_count), (1, 50))
+                self.assertEqual(one, fifty)
+
+    def test_availability_fields_share_one_computation(self):
+        master = self.masters[1]
+        cache.clear()
+        with mock.patch("core.serializers.get_masters_availability", wraps=get_masters_availability) as computed:
+            data = MasterListSerializer(master).data
+        computed.assert_called_once()
+        self.assertEqual(
+            (data["discount_percent"], data["is_available_today"], data["next_available_time"]),
+            (0, True, "23:50"),
+        )
+
+        # bulk context berilsa serializer o'zi query qilmaydi
+        cache.clear()
+        masters = list(Master.objects.select_related("master_location"))
+        availability = get_masters_availability(masters)
+        with self.assertNumQueries(0):
+            data = MasterListSerializer(masters, many=True, context={"availability": availability}).data
+        self.assertEqual(len(data), 50)
+
+
+class MasterConditionalGetTest(TestCase):
+    def setUp(self):
+        self.master = Master.objects.create(full_name="Usta", phone="+998901112233", experience_years=3)
+        MasterAvailability.objects.create(master=self.master, date=timezone.localdate(), available_slots=["23:55"])
+
+    def assert_revalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_changes_with_booking(self):
+        self.assert_revalidates(
+            f"/masters/{self.master.id}/",
+            lambda: Booking.objects.create(
+                user_id=1, master_id=self.master.id, service_type="barber",
+                date=timezone.localdate(), time=time(23, 55), status=BookingStatus.ACCEPTED,
+            ),
+        )
+
+    def test_list_changes_with_master_row(self):
+        self.assert_revalidates(
+            "/masters/list/?size=10",
+            lambda: Master.objects.filter(id=self.master.id).update(price=50000),
+        )
+
+
+class AsyncMasterReadViewsTest(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.masters = [
+            Master.objects.create(full_name=f"Usta {i}", phone=f"+99890111220{i}", experience_years=i, rating=i)
+            for i in range(3)
+        ]
+        MasterAvailability.objects.create(master=self.masters[0], date=today, available_slots=["23:50", "23:55"])
+        MasterWeeklySchedule.objects.create(
+            master=self.masters[1], weekday=(today + timedelta(days=1)).weekday(),
+            start_time=time(9, 0), end_time=time(12, 0),
+        )
+        Booking.objects.create(user_id=1, master_id=self.masters[0].id, service_type="barber",
+                               date=today, time=time(23, 50), status=BookingStatus.ACCEPTED)
+        self.factory = AsyncRequestFactory()
+
+    async def call(self, view, url, *args, **headers):
+        return await view(self.factory.get(url, headers=headers), *args)
+
+    async def test_responses_match_sync_views(self):
+        first = self.masters[0].id
+        cases = [
+            (async_views.master_list, "/masters/list/?size=2&sort=rating&with_total=true", ()),
+            (async_views.master_list, "/masters/list/?page=2&size=2", ()),
+            (async_views.master_detail, f"/masters/{first}/", (first,)),
+            (async_views.master_next_available_time, f"/masters/{self.masters[1].id}/next-available-time/?days=3",
+             (self.masters[1].id,)),
+        ]
+        for view, url, args in cases:
+            with self.subTest(url=url):
+                expected = await AsyncClient().get(url)
+                response = await self.call(view, url, *args)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), expected.json())
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+        page = json.loads((await self.call(async_views.master_list, "/masters/list/?size=2")).content)
+        rest = await self.call(async_views.master_list, f"/masters/list/?size=2&cursor={page['next_cursor']}")
+        self.assertEqual([m["id"] for m in json.loads(rest.content)["results"]], [str(self.masters[2].id).zfill(5)])
+
+    async def test_not_modified_and_errors(self):
+        first = self.masters[0].id
+        etag = (await self.call(async_views.master_detail, f"/masters/{first}/", first))["ETag"]
+        response = await self.call(async_views.master_detail, f"/masters/{first}/", first, **{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual((await self.call(async_views.master_detail, "/masters/999/", 999)).status_code, 404)
+        response = await self.call(async_views.master_next_available_time, f"/masters/{first}/next-available-time/?days=x", first)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("days", json.loads(response.content))
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        # 5 ta usta, reytinglar: 4, 4, 4, 3, 3 (tenglar id bo'yicha ajratiladi)
+        self.masters = [
+            Master.objects.create(full_name=f"Usta {i}", phone=f"+99890111230{i}", experience_years=1,
+                                  rating=4 if i < 3 else 3)
+            for i in range(5)
+        ]
+        self.pagination = KeysetPagination(ordering=('-rating', '-id'))
+        self.factory = RequestFactory()
+
+    def page(self, **params):
+        return self.pagination.paginate_queryset(Master.objects.all(), self.factory.get("/", params))
+
+    def cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def test_seeks_across_equal_ratings(self):
+        expected = sorted(self.masters, key=lambda m: (-m.rating, -m.id))
+        seen, cursor = [], None
+        while True:
+            items, cursor, total = self.page(size=2, **({"cursor": cursor} if cursor else {}))
+            seen += items
+            self.assertIsNone(total)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor, _ = self.page(size=5)
+        self.assertEqual(len(items), 5)
+        self.assertIsNone(cursor)
+
+        items, cursor, _ = self.page(size=4)
+        items, cursor, _ = self.page(size=4, cursor=cursor)
+        self.assertEqual(len(items), 1)
+        self.assertIsNone(cursor)
+
+    def test_with_total(self):
+        _, cursor, total = self.page(size=2, with_total="true")
+        self.assertEqual(total, 5)
+        # total cursor dan qat'i nazar butun ro'yxat bo'yicha
+        self.assertEqual(self.page(size=2, cursor=cursor, with_total="true")[2], 5)
+
+    def test_bad_cursor_values(self):
+        for values in (["abc", 1], [4, "abc"], [None, 1], [[4], 1], [4]):
+            with self.subTest(values=values), self.assertRaises(ValidationError):
+                self.page(cursor=self.cursor(values))
+
+        bad = self.cursor(["abc"])
+        for url in (f"/masters/list/?cursor={bad}", f"/api/bookings/list/?cursor={self.cursor(['abc', 1])}"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.json())
+
+        request = AsyncRequestFactory().get(f"/masters/list/?cursor={bad}")
+        response = asyncio.run(async_views.master_list(request))
+        self.assertEqual(response.status_code, 400)
+
+
+class MasterAvailabilityBulkUpsertTest(TestCase):
+    def setUp(self):
+        self.master = Master.objects.create(full_name="Usta", phone="+998901112233", experience_years=3)
+        self.url = f"/masters/{self.master.id}/availability/bulk/"
+        self.start = timezone.localdate()
+
+    def test_upsert_sets_bitmap_and_reports_per_date(self):
+        MasterAvailability.objects.create(master=self.master, date=self.start, available_slots=["09:00"])
+        payload = [
+            {"date": (self.start + timedelta(days=i)).isoformat(), "available_slots": ["11:00", "10:00"], "discount_percent": i}
+            for i in range(3)
+        ]
+
+        response = self.client.post(self.url, payload, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.json()["results"]], ["updated", "created", "created"])
+        rows = MasterAvailability.objects.filter(master=self.master).order_by("date")
+        self.assertEqual([row.discount_percent for row in rows], [0, 1, 2])
+        self.assertTrue(all(row.available_slots == ["10:00", "11:00"] for row in rows))
+        self.assertEqual(get_free_slots(self.master, self.start), ["10:00", "11:00"])
+
+    def test_invalid_entries_reject_whole_request(self):
+        day = self.start.isoformat()
+        response = self.client.post(
+            self.url,
+            [{"date": day, "available_slots": ["10:00"]}, {"date": day, "available_slots": ["10:07"]}],
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MasterAvailability.objects.exists())
+
+
+@override_settings(AVAILABILITY_CACHE_SECONDS=300)
+class SlotBitmapTest(SimpleTestCase):
+    def test_slot_index(self):
+        self.assertEqual(slot_bitmap.slot_index("00:00"), 0)
+        self.assertEqual(slot_bitmap.slot_index("10:05"), 121)
+        self.assertEqual(slot_bitmap.slot_index("10:05:00"), 121)
+        self.assertEqual(slot_bitmap.slot_index(time(23, 55)), slot_bitmap.SLOTS_PER_DAY - 1)
+
+        for off_grid in ("10:07", "10:05:30", time(10, 0, 1)):
+            with self.subTest(value=off_grid):
+                self.assertIsNone(slot_bitmap.slot_index(off_grid))
+        for invalid in ("abc", "10", "24:00", "10:60", "10:00:00:00", ""):
+            with self.subTest(value=invalid), self.assertRaises(ValueError):
+                slot_bitmap.slot_index(invalid)
+
+    def test_encode_slots_strict(self):
+        self.assertEqual(slot_bitmap.encode_slots(["00:00", "00:10"]), 0b101)
+        self.assertEqual(slot_bitmap.encode_slots(None), 0)
+        for bad in (["10:00", "10:07"], ["10:00", "abc"]):
+            with self.subTest(slots=bad):
+                with self.assertRaises(ValueError):
+                    slot_bitmap.encode_slots(bad)
+                self.assertEqual(slot_bitmap.encode_slots(bad, strict=False), 1 << 120)
+
+    def test_decode_and_first_slot_round_trip(self):
+        slots = ["09:00", "09:05", "13:30", "23:55"]
+        mask = slot_bitmap.encode_slots(slots)
+        self.assertEqual(slot_bitmap.decode_slots(mask), slots)
+        self.assertEqual(slot_bitmap.decode_slots(slot_bitmap.from_bytes(slot_bitmap.to_bytes(mask))), slots)
+        self.assertEqual(slot_bitmap.first_slot(mask), "09:00")
+        self.assertEqual(slot_bitmap.first_slot(mask & ~slot_bitmap.encode_slots(["09:00"])), "09:05")
+        self.assertIsNone(slot_bitmap.first_slot(0))
+        self.assertEqual(slot_bitmap.decode_slots(0), [])
+        self.assertEqual(len(slot_bitmap.to_bytes(slot_bitmap.FULL_DAY_MASK)), slot_bitmap.BITMAP_BYTES)
+
+    def test_schedule_mask_with_breaks(self):
+        mask = slot_bitmap.schedule_mask(time(9, 0), time(12, 0), 30, [("10:00", "10:45")])
+        # 10:30 slot 10:30-11:00 tanaffus bilan kesishadi, 11:30 end ga sig'adi
+        self.assertEqual(slot_bitmap.decode_slots(mask), ["09:00", "09:30", "11:00", "11:30"])
+
+        mask = slot_bitmap.schedule_mask("09:00", "10:20", 25)
+        self.assertEqual(slot_bitmap.decode_slots(mask), ["09:00", "09:25", "09:50"])
+
+        for args in ((time(9, 0), time(10, 0), 7), (time(9, 0), time(10, 0), 0), (time(9, 1), time(10, 0), 30)):
+            with self.subTest(args=args), self.assertRaises(ValueError):
+                slot_bitmap.schedule_mask(*args)
+
+    def test_upcoming_mask_boundary(self):
+        day = slot_bitmap.encode_slots(["10:00", "10:05"])
+        self.assertEqual(slot_bitmap.decode_slots(day & slot_bitmap.upcoming_mask(time(10, 0, 0))), ["10:00", "10:05"])
+        self.assertEqual(slot_bitmap.decode_slots(day & slot_bitmap.upcoming_mask(time(10, 0, 1))), ["10:05"])
+        self.assertEqual(slot_bitmap.decode_slots(day & slot_bitmap.upcoming_mask(time(10, 0, 0, 1))), ["10:05"])
+        self.assertEqual(slot_bitmap.upcoming_mask(time(0, 0)), slot_bitmap.FULL_DAY_MASK)
+        self.assertEqual(slot_bitmap.upcoming_mask(time(23, 55, 1)), 0)
+
+
+class DistanceTest(SimpleTestCase):
+    origin = (41.3111, 69.2797)
+    # (lat, lng): 0 va 3 bir xil nuqta, 1 origin ning o'zi
+    points = [(41.3211, 69.2797), (41.3111, 69.2797), (41.4111, 69.2797), (41.3211, 69.2797), (40.3111, 69.2797)]
+
+    def backends(self):
+        self.assertIsNotNone(utils.np, "numpy requirements.txt da bor")
+        yield "numpy"
+        with mock.patch.object(utils, "np", None):
+            yield "python"
+
+    def test_backends_agree_with_calculate_distance_km(self):
+        lats, lngs = zip(*self.points, (-33.8688, 151.2093))
+        expected = [utils.calculate_distance_km(*self.origin, lat, lng) for lat, lng in zip(lats, lngs)]
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                distances = utils.calculate_distances_km(*self.origin, lats, lngs)
+                self.assertIsInstance(distances, list)
+                self.assertEqual([round(d, 2) for d in distances], expected)
+
+    def test_nearest_k(self):
+        lats, lngs = zip(*self.points)
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                nearest = utils.nearest_k(*self.origin, lats, lngs, 3)
+                # teng masofada kichik index oldin
+                self.assertEqual([index for index, _ in nearest], [1, 0, 3])
+                self.assertEqual([d for _, d in nearest], sorted(d for _, d in nearest))
+
+                self.assertEqual(len(utils.nearest_k(*self.origin, lats, lngs, 10)), 5)
+                within = utils.nearest_k(*self.origin, lats, lngs, 10, max_distance_km=12)
+                self.assertEqual([index for index, _ in within], [1, 0, 3, 2])
+                self.assertTrue(all(d <= 12 for _, d in within))
+                self.assertEqual(utils.nearest_k(*self.origin, lats, lngs, 3, max_distance_km=0.5), [(1, 0.0)])
+                self.assertEqual(utils.nearest_k(*self.origin, lats, lngs, 0), [])
+                self.assertEqual(utils.nearest_k(*self.origin, [], [], 3), [])
+
+
+class MasterNearbyAPITest(APITestCase):
+    url = "/masters/nearby/"
+    origin = {"lat": 41.3111, "lng": 69.2797}
+
+    def setUp(self):
+        # lat bo'yicha origin dan ~0.5, 2.2, 4.4, 6.7 km (kiritish tartibi aralash)
+        self.masters = {}
+        for name, dlat in (("far", 0.06), ("near", 0.0045), ("middle", 0.04), ("close", 0.02)):
+            master = Master.objects.create(full_name=name, phone=f"+99890{len(self.masters):07d}", experience_years=1)
+            MasterLocation.objects.create(master=master, lat=self.origin["lat"] + dlat, lng=self.origin["lng"],
+                                          address="", district="", place_id="", accuracy=10)
+            self.masters[name] = master
+        other = Master.objects.create(full_name="other", phone="+998911111111", experience_years=1, service_type="nail")
+        MasterLocation.objects.create(master=other, lat=self.origin["lat"], lng=self.origin["lng"],
+                                      address="", district="", place_id="", accuracy=10)
+
+    def names(self, response):
+        by_id = {str(m.id).zfill(5): name for name, m in self.masters.items()}
+        return [by_id[row["id"]] for row in response.json()["results"]]
+
+    def test_ranked_by_distance_within_radius(self):
+        response = self.client.get(self.url, self.origin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["radius_km"], 5)
+        self.assertEqual(self.names(response), ["near", "close", "middle"])
+        distances = [row["distance_km"] for row in response.json()["results"]]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[0], 0.5, places=1)
+
+    def test_radius_cutoff_and_cap(self):
+        self.assertEqual(self.names(self.client.get(self.url, {**self.origin, "radius_km": 3})), ["near", "close"])
+        self.assertEqual(self.names(self.client.get(self.url, {**self.origin, "radius_km": 0.1})), [])
+
+        response = self.client.get(self.url, {**self.origin, "radius_km": 1000})
+        self.assertEqual(response.json()["radius_km"], 50)
+        self.assertEqual(self.names(response), ["near", "close", "middle", "far"])
+
+    def test_size_limit(self):
+        response = self.client.get(self.url, {**self.origin, "radius_km": 10, "size": 2})
+        self.assertEqual(self.names(response), ["near", "close"])
+        response = self.client.get(self.url, {**self.origin, "radius_km": 10, "size": 0})
+        self.assertEqual(self.names(response), ["near"])
+
+    def test_bad_params(self):
+        for params in (
+            {}, {"lat": 41.3}, {"lat": "x", "lng": 69.2}, {**self.origin, "size": "x"},
+            {"lat": 91, "lng": 69.2}, {"lat": 41.3, "lng": -181}, {"lat": "nan", "lng": 69.2},
+            {**self.origin, "radius_km": "nan"}, {**self.origin, "radius_km": "inf"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("detail", response.json())
+
+
+class MasterWeeklyScheduleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.master = Master.objects.create(full_name="Usta", phone="+998901112233", experience_years=3)
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.url = f"/masters/{self.master.id}/schedule/"
+
+    def put_schedule(self, **entry):
+        payload = [{"weekday": self.date.weekday(), "start_time": "09:00", "end_time": "12:00",
+                    "slot_minutes": 60, "breaks": [{"start": "10:00", "end": "10:30"}], **entry}]
+        return self.client.put(self.url, payload, content_type="application/json")
+
+    def test_template_expands_for_dates_without_rows(self):
+        self.assertEqual(self.put_schedule().status_code, 200)
+        self.assertEqual(get_free_slots(self.master, self.date), ["09:00", "11:00"])
+        self.assertTrue(filter_available_today(Master.objects.all(), self.date).exists())
+
+        self.put_schedule(slot_minutes=30)
+        self.assertEqual(get_free_slots(self.master, self.date), ["09:00", "09:30", "10:30", "11:00", "11:30"])
+
+    def test_explicit_row_overrides_template(self):
+        self.put_schedule()
+        MasterAvailability.objects.create(master=self.master, date=self.date, available_slots=[])
+
+        self.assertEqual(get_free_slots(self.master, self.date), [])
+        self.assertFalse(filter_available_today(Master.objects.all(), self.date).exists())
+
+    def test_invalid_template_is_rejected(self):
+        response = self.put_schedule(start_time="09:03")
+        self.assertEqual(response.status_code, 400)
+
+
+class FilterAvailableTodayTest(TestCase):
+    def setUp(self):
+        self.date = timezone.localdate() + timedelta(days=3)
+        self.master = Master.objects.create(full_name="Usta", phone="+998901112233", experience_years=3)
+
+    def book(self, hour, minute=0):
+        Booking.objects.create(user_id=1, master_id=self.master.id, service_type="barber",
+                               date=self.date, time=time(hour, minute), status=BookingStatus.ACCEPTED)
+
+    def assert_filter_matches_free_slots(self, expected_free):
+        self.assertEqual(get_free_slots(self.master, self.date), expected_free)
+        self.assertEqual(filter_available_today(Master.objects.all(), self.date).exists(), bool(expected_free))
+
+    def test_bookings_outside_published_slots_are_ignored(self):
+        MasterAvailability.objects.create(master=self.master, date=self.date, available_slots=["10:00", "11:00"])
+        self.book(10, 0)
+        self.book(10, 7)
+        self.assert_filter_matches_free_slots(["11:00"])
+
+        self.book(11, 0)
+        self.assert_filter_matches_free_slots([])
+
+    def test_duplicate_and_off_grid_slots_are_not_counted(self):
+        # JSON da 4 ta yozuv, bitmapda bitta slot
+        availability = MasterAvailability.objects.create(
+            master=self.master, date=self.date, available_slots=["10:00", "10:00", "10:07", "abc"],
+        )
+        self.assertEqual(availability.slots_count, 1)
+        self.assert_filter_matches_free_slots(["10:00"])
+
+        self.book(10, 0)
+        self.assert_filter_matches_free_slots([])
+
+    def test_schedule_edited_after_bookings(self):
+        availability = MasterAvailability.objects.create(master=self.master, date=self.date, available_slots=["10:00", "11:00"])
+        self.book(10, 0)
+        self.book(11, 0)
+        availability.available_slots = ["11:00", "12:00"]
+        availability.save()
+        self.assert_filter_matches_free_slots(["12:00"])
+
+    def test_template_bookings_off_template_are_ignored(self):
+        MasterWeeklySchedule.objects.create(master=self.master, weekday=self.date.weekday(),
+                                            start_time=time(9, 0), end_time=time(10, 0), slot_minutes=30)
+        self.book(9, 0)
+        self.book(12, 0)
+        self.assert_filter_matches_free_slots(["09:30"])
+
+        self.book(9, 30)
+        self.assert_filter_matches_free_slots([])
+
+
+class FindNextAvailableTest(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.now = timezone.make_aware(datetime.combine(self.today, time(12, 0)))
+        self.busy = Master.objects.create(full_name="Band", phone="+998901112233", experience_years=3)
+        self.free = Master.objects.create(full_name="Bo'sh", phone="+998901112244", experience_years=3)
+
+    def test_earliest_slot_across_days_and_sources(self):
+        # bugun: 10:00 o'tib ketgan, 13:00 band
+        MasterAvailability.objects.create(master=self.busy, date=self.today, available_slots=["10:00", "13:00"])
+        Booking.objects.create(user_id=1, master_id=self.busy.id, service_type="barber",
+                               date=self.today, time=time(13, 0), status=BookingStatus.ACCEPTED)
+        MasterWeeklySchedule.objects.create(
+            master=self.busy, weekday=(self.today + timedelta(days=2)).weekday(),
+            start_time=time(9, 0), end_time=time(10, 0), slot_minutes=60,
+        )
+        MasterAvailability.objects.create(master=self.free, date=self.today, available_slots=["12:00", "15:00"])
+
+        with self.assertNumQueries(3):
+            found = find_next_available([self.busy.id, self.free.id], days=5, now=self.now)
+
+        self.assertEqual(found[self.busy.id], (self.today + timedelta(days=2), "09:00"))
+        self.assertEqual(found[self.free.id], (self.today, "12:00"))
+
+    def test_nothing_in_range(self):
+        found = find_next_available([self.busy.id], days=20, window_days=7, now=self.now)
+        self.assertEqual(found, {self.busy.id: None})
+
+
+class BookingExportTest(TestCase):
+    url = "/api/bookings/list/"
+    fields = [
+        "id", "user_id", "master_id", "service_type", "date", "time", "payment_type", "status",
+        "expires_at", "reject_reason", "client_confirmed", "created_at", "updated_at",
+    ]
+
+    def setUp(self):
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.ids = [
+            Booking.objects.create(user_id=1, master_id=master_id, service_type="barber",
+                                   date=self.date, time=time(hour, 0)).id
+            for master_id, hour in ((7, 10), (8, 11), (7, 12))
+        ]
+
+    def export(self, query, **headers):
+        response = self.client.get(f"{self.url}?{query}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, body = self.export("format=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="bookings.ndjson"')
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], self.ids)
+        self.assertEqual(list(rows[0]), self.fields)
+        self.assertEqual((rows[0]["date"], rows[0]["time"], rows[0]["status"]), (self.date.isoformat(), "10:00:00", "pending"))
+
+    def test_csv_with_filters(self):
+        response, body = self.export("format=csv&master_id=7")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="bookings.csv"')
+
+        lines = body.splitlines()
+        self.assertEqual(lines[0].split(","), self.fields)
+        self.assertEqual([int(line.split(",")[0]) for line in lines[1:]], [self.ids[0], self.ids[2]])
+
+        _, body = self.export("format=csv&master_id=999")
+        self.assertEqual(body.splitlines(), [",".join(self.fields)])
+
+    def test_accept_header_selects_export(self):
+        response, body = self.export("", Accept="application/x-ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertEqual(len(body.splitlines()), 3)
+
+    def test_uses_effective_status(self):
+        Booking.objects.filter(id=self.ids[0]).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        _, body = self.export("format=ndjson&status=cancelled")
+        self.assertEqual([(row["id"], row["status"]) for row in map(json.loads, body.splitlines())],
+                         [(self.ids[0], "cancelled")])
+
+        _, body = self.export("format=csv")
+        self.assertEqual([line.split(",")[7] for line in body.splitlines()[1:]], ["cancelled", "pending", "pending"])
+
+    def test_unknown_format(self):
+        response = self.client.get(f"{self.url}?format=xml")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("format", response.json())
+
+
+class BookingBulkMasterActionTest(TestCase):
+    def setUp(self):
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.url = "/api/bookings/master/7/actions/"
+
+    def book(self, hour, master_id=7, **extra):
+        return Booking.objects.create(
+            user_id=1, master_id=master_id, service_type="barber",
+            date=self.date, time=time(hour, 0), **extra,
+        ).id
+
+    def test_per_id_outcomes(self):
+        accept, reject, done = self.book(10), self.book(11), self.book(12, status=BookingStatus.COMPLETED)
+        expired = self.book(13)
+        Booking.objects.filter(id=expired).update(expires_at=timezone.now() - timedelta(minutes=1))
+        other_master = self.book(14, master_id=8)
+
+        # savepoint + (FOR UPDATE + UPDATE) x 2 holat + natija SELECT + release
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, {"actions": [
+                {"booking_id": accept, "status": "accepted"},
+                {"booking_id": reject, "status": "rejected", "reason": "Band"},
+                {"booking_id": done, "status": "accepted"},
+                {"booking_id": expired, "status": "rejected", "reason": "Band"},
+                {"booking_id": other_master, "status": "accepted"},
+            ]}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        outcomes = {r["booking_id"]: (r["success"], r.get("status"), r.get("error")) for r in response.json()["results"]}
+        self.assertEqual(outcomes, {
+            accept: (True, "accepted", None),
+            reject: (True, "rejected", None),
+            done: (False, "completed", "invalid_transition"),
+            expired: (False, "cancelled", "invalid_transition"),
+            other_master: (False, None, "not_found"),
+        })
+        self.assertEqual(Booking.objects.get(id=reject).reject_reason, "Band")
+        self.assertIsNone(Booking.objects.get(id=accept).reject_reason)
+
+    def test_success_comes_from_the_compare_and_set(self):
+        # boshqa yozuvchi xuddi shu holatni xuddi shu now bilan qo'ygan: bu chaqiruv muvaffaqiyati emas
+        now = timezone.now()
+        theirs, mine = self.book(10), self.book(11)
+        Booking.objects.filter(id=theirs).update(status=BookingStatus.ACCEPTED, updated_at=now)
+
+        results = bulk_master_action(7, [
+            {"booking_id": theirs, "status": "accepted"},
+            {"booking_id": mine, "status": "accepted"},
+        ], now=now)
+
+        self.assertEqual(results[theirs], {"success": False, "error": "invalid_transition", "status": "accepted"})
+        self.assertEqual(results[mine], {"success": True, "status": "accepted"})
+
+    def test_reject_requires_reason(self):
+        response = self.client.post(self.url, {"actions": [{"booking_id": self.book(10), "status": "rejected"}]},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingStateMachineTest(TestCase):
+    def setUp(self):
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.booking = Booking.objects.create(
+            user_id=1, master_id=7, service_type="barber", date=self.date, time=time(10, 0),
+        )
+
+    def patch(self, path, data=None):
+        return self.client.patch(f"/api/bookings/{self.booking.id}/{path}", data or {}, content_type="application/json")
+
+    def test_happy_path(self):
+        self.assertEqual(self.patch("", {"status": "accepted"}).json(), {"booking_id": self.booking.id, "status": "accepted"})
+        self.assertEqual(self.patch("confirm", {"client_confirmed": True}).json()["status"], "confirmed")
+        self.assertEqual(self.patch("complete").json()["status"], "completed")
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, BookingStatus.COMPLETED)
+        self.assertTrue(self.booking.client_confirmed)
+
+    def test_invalid_transitions_conflict(self):
+        response = self.patch("complete")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["status"], "pending")
+
+        self.patch("", {"status": "rejected", "reason": "Band"})
+        self.assertEqual(self.patch("", {"status": "accepted"}).status_code, 409)
+        self.assertEqual(self.client.patch("/api/bookings/999999/complete").status_code, 404)
+
+    def test_client_not_confirmed_frees_slot(self):
+        self.patch("", {"status": "accepted"})
+        self.assertEqual(self.patch("confirm", {"client_confirmed": False}).json()["status"], "client_not_confirmed")
+
+        # slot bo'shadi: shu vaqtga yangi booking yaratish mumkin
+        response = self.client.post("/booking/", {
+            "user_id": 2, "master_id": 7, "service_type": "barber",
+            "date": self.date.isoformat(), "time": "10:00", "payment_type": "cash",
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_confirm_too_late(self):
+        Booking.objects.filter(id=self.booking.id).update(status=BookingStatus.ACCEPTED, date=timezone.localdate() - timedelta(days=1))
+        self.assertEqual(self.patch("confirm", {"client_confirmed": True}).status_code, 400)
+
+
+class BookingEventStreamTest(TestCase):
+    def setUp(self):
+        self.broker = events.InProcessBroker()
+        patch = mock.patch.object(events, "_broker", self.broker)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def read_events(self, response, count):
+        chunks = response.streaming_content
+        received = []
+        while len(received) < count:
+            chunk = await asyncio.wait_for(anext(chunks), timeout=2)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith("id:"):
+                received.append(chunk.split("\n")[0].removeprefix("id: "))
+        return received
+
+    def test_transitions_publish_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(user_id=1, master_id=7, service_type="barber",
+                                             date=timezone.localdate() + timedelta(days=1), time=time(10, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/bookings/{booking.id}/", {"status": "accepted"}, content_type="application/json")
+
+        published = [(event["type"], event["status"]) for _, event in self.broker._buffer]
+        self.assertEqual(published, [("booking.created", "pending"), ("booking.status", "accepted")])
+
+    async def test_stream_filters_and_resumes_from_last_event_id(self):
+        for master_id in (7, 8, 7):
+            self.broker.publish(events.booking_event("booking.created", master_id * 10, master_id, "pending"))
+
+        response = await AsyncClient().get("/api/bookings/events/?master_id=7", headers={"Last-Event-ID": "1"})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        self.assertEqual(await self.read_events(response, 1), ["3"])
+        self.broker.publish(events.booking_event("booking.status", 70, 7, "accepted"))
+        self.assertEqual(await self.read_events(response, 1), ["4"])
+        await response.streaming_content.aclose()
+
+    def test_requires_asgi_and_filter(self):
+        self.assertEqual(self.client.get("/api/bookings/events/?master_id=7").status_code, 501)
+
+
+pool_stats_calls = []
+
+
+def record_pool_stats(alias, stats):
+    pool_stats_calls.append((alias, stats))
+
+
+@skipIf(not settings.DATABASES["default"].get("OPTIONS", {}).get("pool"), "DB_POOL=1 va PostgreSQL kerak")
+@override_settings(DB_POOL_STATS_INTERVAL=60, DB_POOL_STATS_HOOK="core.tests.record_pool_stats")
+class DbPoolStatsTest(TestCase):
+    def setUp(self):
+        pool_stats_calls.clear()
+        patch = mock.patch.object(dbpool, "_last_report", 0.0)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_hook_runs_after_request_at_interval(self):
+        with mock.patch.object(dbpool.time, "monotonic", return_value=1000.0):
+            self.client.get("/masters/list/")
+            self.client.get("/masters/list/")
+
+        self.assertEqual(len(pool_stats_calls), 1)
+        alias, stats = pool_stats_calls[0]
+        self.assertEqual(alias, "default")
+        self.assertEqual(stats["pool_max"], settings.DATABASES["default"]["OPTIONS"]["pool"]["max_size"])
+
+        dbpool.report_pool_stats(now=1061.0)
+        self.assertEqual(len(pool_stats_calls), 2)
@@ -1,8 +1,19 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 
+# ASGI deploy da (ASYNC_READ_VIEWS=1) master o'qish endpointlari async ORM bilan
+if settings.ASYNC_READ_VIEWS:
+    master_list_view = async_views.master_list
+    master_detail_view = async_views.master_detail
+    master_next_available_time_view = async_views.master_next_available_time
+else:
+    master_list_view = views.MasterListAPIView.as_view()
+    master_detail_view = views.MasterDetailAPIView.as_view()
+    master_next_available_time_view = views.MasterNextAvailableTimeAPIView.as_view()
+
 
 urlpatterns = [
     #Booking URLs
@@ -11,15 +22,21 @@ urlpatterns = [
     path('api/bookings/<int:id>/confirm', views.BookingClientConfirmAPIView.as_view(), name='booking-client-confirm'),
     path('api/bookings/<int:id>/complete', views.BookingCompleteAPIView.as_view(), name='booking-complete'),
     path('api/bookings/list/', views.BookingListAPIView.as_view(), name='booking-list'),
+    path('api/bookings/events/', views.booking_events, name='booking-events'),
+    path('api/bookings/master/<int:master_id>/actions/', views.BookingBulkMasterActionView.as_view(), name='booking-bulk-master-action'),
 
 
     #Master URLs
     path('test/', views.TestAPIView.as_view(), name='test-api'),
     path('masters/', views.MasterCreateAPIView.as_view(), name='master-create'),
-    path('masters/list/', views.MasterListAPIView.as_view(), name='master-list'),
+    path('masters/list/', master_list_view, name='master-list'),
+    path('masters/nearby/', views.MasterNearbyAPIView.as_view(), name='master-nearby'),
+    path('masters/next-available/', views.MasterNextAvailableBulkAPIView.as_view(), name='master-next-available-bulk'),
     path('masters/<int:master_id>/availability/', views.MasterAvailabilityPatchAPIView.as_view(), name='master-availability-patch'),
-    path('masters/<int:id>/', views.MasterDetailAPIView.as_view(), name='master-detail'),
-    path('masters/<int:master_id>/next-available-time/', views.MasterNextAvailableTimeAPIView.as_view() , name='master-next-available-time'),
+    path('masters/<int:master_id>/availability/bulk/', views.MasterAvailabilityBulkUpsertAPIView.as_view(), name='master-availability-bulk'),
+    path('masters/<int:master_id>/schedule/', views.MasterWeeklyScheduleAPIView.as_view(), name='master-weekly-schedule'),
+    path('masters/<int:id>/', master_detail_view, name='master-detail'),
+    path('masters/<int:master_id>/next-available-time/', master_next_available_time_view, name='master-next-available-time'),
 
     #OTP URLs
     path("api/auth/master/send-otp", views.MasterSendOtpAPIView.as_view()),
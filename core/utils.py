@@ -1,29 +1,99 @@
 from django.utils import timezone
+from django.db.models import Count, F, Func, IntegerField, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, ExtractHour, ExtractMinute, ExtractSecond, Mod
 from core.models import Booking, BookingStatus
-from datetime import date
-from .models import MasterAvailability
+from datetime import timedelta
+from collections import defaultdict
+from .models import MasterAvailability, MasterLocation, MasterWeeklySchedule
+from core import slots as slot_bitmap
+from core import availability_cache
+from core.events import booking_event, publish_on_commit
 
 
 
 import math
+import heapq
 
+try:
+    import numpy as np
+except ImportError:  # numpy ixtiyoriy, bo'lmasa pure-Python fallback ishlaydi
+    np = None
 
+EARTH_RADIUS_KM = 6371
 
 
-def cancel_expired_bookings():
-    now = timezone.now()
+# slotni band qilib turgan bookinglar; muddati o'tgan pending lar sweeper
+# hali bekor qilmagan bo'lsa ham bo'sh deb hisoblanadi
+def active_bookings_q(now=None):
+    if now is None:
+        now = timezone.now()
+    return (
+        Q(status__in=[BookingStatus.ACCEPTED, BookingStatus.CONFIRMED])
+        | Q(status=BookingStatus.PENDING, expires_at__gte=now)
+    )
+
+
+def _empty_availability():
+    return {
+        "is_available_today": False,
+        "next_available_time": None,
+        "discount_percent": 0
+    }
+
+
+
+
+# muddati o'tgan pending bookinglarni batch-batch bekor qiladi (expire_bookings command)
+def cancel_expired_bookings(batch_size=1000, now=None):
+    if now is None:
+        now = timezone.now()
+
+    cancelled = 0
+    while True:
+        rows = list(
+            Booking.objects.filter(
+                status=BookingStatus.PENDING,
+                expires_at__lt=now
+            ).order_by('expires_at').values_list('id', 'master_id', 'date', 'time')[:batch_size]
+        )
+        if not rows:
+            break
+
+        cancelled += Booking.objects.filter(
+            id__in=[row[0] for row in rows],
+            status=BookingStatus.PENDING
+        ).update(status=BookingStatus.CANCELLED, updated_at=now)
 
-    Booking.objects.filter(
+        for booking_id, master_id, booking_date, booking_time in rows:
+            publish_on_commit(booking_event(
+                "booking.status", booking_id, master_id, BookingStatus.CANCELLED, booking_date, booking_time
+            ))
+
+        if len(rows) < batch_size:
+            break
+
+    return cancelled
+
+
+# bitta slotni egallab turgan muddati o'tgan pending bookingni bekor qiladi
+def cancel_expired_slot_booking(master_id, date, time, now=None):
+    if now is None:
+        now = timezone.now()
+
+    return Booking.objects.filter(
+        master_id=master_id,
+        date=date,
+        time=time,
         status=BookingStatus.PENDING,
         expires_at__lt=now
-    ).update(status=BookingStatus.CANCELLED)
+    ).update(status=BookingStatus.CANCELLED, updated_at=now)
 
     
 
 
 
 def calculate_distance_km(lat1, lng1, lat2, lng2):
-    R = 6371 
+    R = EARTH_RADIUS_KM
     lat1_rad = math.radians(lat1)
     lng1_rad = math.radians(lng1)
     lat2_rad = math.radians(lat2)
@@ -39,123 +109,496 @@ def calculate_distance_km(lat1, lng1, lat2, lng2):
     return round(distance, 2)
 
 
-# today uchun bookinglarni qaytaradi
-def get_today_bookings_for_master(master_id, date):
-    return Booking.objects.filter(
-        master_id=master_id,
-        date=date,
-        status__in=[
-            BookingStatus.PENDING,
-            BookingStatus.ACCEPTED,
-            BookingStatus.CONFIRMED
-        ]
-    ).values_list('time', flat=True)
+# bitta nuqtadan ko'p nuqtalargacha masofa (km, yaxlitlanmagan) bitta chaqiruvda
+def calculate_distances_km(lat, lng, lats, lngs):
+    if np is not None:
+        return _distances_km_numpy(lat, lng, lats, lngs).tolist()
+    return _distances_km_python(lat, lng, lats, lngs)
 
 
-# master va date boyicha bo'sh slotlarni qaytaradi
-def get_free_slots(master, date):
-    availability = MasterAvailability.objects.filter(
-        master=master,
-        date=date
-    ).first()
+def _distances_km_numpy(lat, lng, lats, lngs):
+    lat_rad = math.radians(lat)
+    lats_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lats_rad - lat_rad
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64)) - math.radians(lng)
+
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _distances_km_python(lat, lng, lats, lngs):
+    lat_rad = math.radians(lat)
+    lng_rad = math.radians(lng)
+    cos_lat = math.cos(lat_rad)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
 
-    if not availability:
+    distances = []
+    for other_lat, other_lng in zip(lats, lngs):
+        other_lat_rad = radians(other_lat)
+        a = (
+            sin((other_lat_rad - lat_rad) / 2) ** 2
+            + cos_lat * cos(other_lat_rad) * sin((radians(other_lng) - lng_rad) / 2) ** 2
+        )
+        distances.append(2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, a))))
+    return distances
+
+
+# eng yaqin k ta nuqta: masofa bo'yicha tartiblangan [(index, distance_km), ...]
+def nearest_k(lat, lng, lats, lngs, k, max_distance_km=None):
+    if k <= 0 or not len(lats):
         return []
 
-    schedule_slots = availability.available_slots
-    booked_slots = get_today_bookings_for_master(master.id, date)
+    if np is None:
+        distances = _distances_km_python(lat, lng, lats, lngs)
+        candidates = (
+            (distance, index) for index, distance in enumerate(distances)
+            if max_distance_km is None or distance <= max_distance_km
+        )
+        return [(index, distance) for distance, index in heapq.nsmallest(k, candidates)]
+
+    distances = _distances_km_numpy(lat, lng, lats, lngs)
+    indexes = np.arange(len(distances))
+    if max_distance_km is not None:
+        indexes = np.flatnonzero(distances <= max_distance_km)
+    if len(indexes) > k:
+        indexes = indexes[np.argpartition(distances[indexes], k - 1)[:k]]
+    indexes = indexes[np.lexsort((indexes, distances[indexes]))]
+    return list(zip(indexes.tolist(), distances[indexes].tolist()))
+
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+# radius_km atrofidagi lat/lng bounding box (indeksli prefilter uchun)
+def bounding_box(lat, lng, radius_km):
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6:
+        dlng = 180.0
+    else:
+        dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return (lat - dlat, lat + dlat, lng - dlng, lng + dlng)
+
+
+# lat/lng atrofidagi eng yaqin masterlar: [(master_id, distance_km), ...]
+def find_nearby_master_ids(lat, lng, radius_km, limit, queryset=None):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+
+    locations = MasterLocation.objects.filter(
+        lat__range=(min_lat, max_lat),
+        lng__range=(min_lng, max_lng),
+    )
+    if queryset is not None:
+        locations = locations.filter(master__in=queryset)
+
+    rows = list(locations.values_list('master_id', 'lat', 'lng'))
+    if not rows:
+        return []
 
+    master_ids, lats, lngs = zip(*rows)
     return [
-        slot for slot in schedule_slots
-        if slot not in booked_slots
+        (master_ids[index], round(distance, 2))
+        for index, distance in nearest_k(lat, lng, lats, lngs, limit, max_distance_km=radius_km)
     ]
 
-# master va date boyicha availability ni qaytaradi
-def get_master_availability(master, date=None):
-    if not date:
-        date = timezone.localdate()
 
-    free_slots = get_free_slots(master, date)
+# master va date boyicha bo'sh slotlarni qaytaradi
+def get_free_slots(master, date):
+    return slot_bitmap.decode_slots(get_availability_snapshots([master.id], date)[master.id]["free"])
 
-    if not free_slots:
-        return {
-            "is_available_today": False,
-            "next_available_time": None,
-            "discount_percent": 0
-        }
 
-    availability = MasterAvailability.objects.filter(
-        master=master,
+# snapshot querylari: sync va async (ASGI) variantlar bir xil querysetlarni
+# o'qiydi, natija _build_snapshots da yig'iladi
+def _snapshot_availability_qs(master_ids, date):
+    return MasterAvailability.objects.filter(
+        master_id__in=master_ids,
         date=date
-    ).first()
+    ).only('master_id', 'slots_bitmap', 'discount_percent')
 
-    return {
-        "is_available_today": True,
-        "next_available_time": free_slots[0],
-        "discount_percent": availability.discount_percent if availability else 0
-    }
+
+def _snapshot_template_qs(master_ids, date):
+    return MasterWeeklySchedule.objects.filter(
+        master_id__in=master_ids,
+        weekday=date.weekday()
+    ).only('master_id', 'slots_bitmap', 'discount_percent')
+
+
+def _snapshot_booked_qs(master_ids, date, now):
+    return Booking.objects.filter(
+        active_bookings_q(now),
+        master_id__in=master_ids,
+        date=date
+    ).values_list('master_id', 'time', 'status', 'expires_at')
 
 
+def compute_availability_snapshots(master_ids, date):
+    """
+    {master_id: {"free": bitmap, "discount": int, "valid_until": timestamp | None}}.
+    valid_until - eng erta aktiv pending bookingning muddati: shundan keyin
+    slot bo'shaydi, snapshotni qayta hisoblash kerak.
+    """
+    now = timezone.now()
+    availabilities = {a.master_id: a for a in _snapshot_availability_qs(master_ids, date)}
+
+    # aniq qatori yo'q masterlar uchun haftalik shablon
+    without_row = [master_id for master_id in master_ids if master_id not in availabilities]
+    if without_row:
+        availabilities.update((t.master_id, t) for t in _snapshot_template_qs(without_row, date))
+
+    booked_rows = []
+    if availabilities:
+        booked_rows = _snapshot_booked_qs(list(availabilities), date, now)
+    return _build_snapshots(master_ids, availabilities, booked_rows)
+
+
+async def acompute_availability_snapshots(master_ids, date):
+    now = timezone.now()
+    availabilities = {a.master_id: a async for a in _snapshot_availability_qs(master_ids, date)}
 
-#  today uchun availability ni qaytaradi
-def get_today_availability(master):
-    today = date.today()
+    without_row = [master_id for master_id in master_ids if master_id not in availabilities]
+    if without_row:
+        availabilities.update([(t.master_id, t) async for t in _snapshot_template_qs(without_row, date)])
 
-    availability = MasterAvailability.objects.filter(
-        master=master,
-        date=today
-    ).first()
+    booked_rows = []
+    if availabilities:
+        booked_rows = [row async for row in _snapshot_booked_qs(list(availabilities), date, now)]
+    return _build_snapshots(master_ids, availabilities, booked_rows)
 
-    if not availability:
-        return {
-            "is_available_today": False,
-            "next_available_time": None,
-            "discount_percent": 0
+
+def _build_snapshots(master_ids, availabilities, booked_rows):
+    result = {
+        master_id: {"free": 0, "discount": 0, "valid_until": None}
+        for master_id in master_ids
+    }
+
+    booked = defaultdict(list)
+    valid_until = {}
+    for master_id, booked_time, booking_status, expires_at in booked_rows:
+        booked[master_id].append(booked_time)
+        if booking_status == BookingStatus.PENDING and expires_at:
+            ts = expires_at.timestamp()
+            valid_until[master_id] = min(ts, valid_until.get(master_id, ts))
+
+    for master_id, availability in availabilities.items():
+        result[master_id] = {
+            "free": slot_bitmap.free_mask(
+                availability.slots_mask,
+                slot_bitmap.encode_times(booked[master_id])
+            ),
+            "discount": availability.discount_percent,
+            "valid_until": valid_until.get(master_id),
         }
 
-    slots = availability.available_slots.copy()
+    return result
 
-    bookings = Booking.objects.filter(
-        master_id=master.id,
-        date=today
-    ).exclude(
-        status=BookingStatus.CANCELLED
+
+# (master_id, date) snapshotlari cache orqali (core/availability_cache.py)
+def get_availability_snapshots(master_ids, date=None):
+    if not date:
+        date = timezone.localdate()
+    return availability_cache.get_snapshots(list(master_ids), date, compute_availability_snapshots)
+
+
+async def aget_availability_snapshots(master_ids, date=None):
+    if not date:
+        date = timezone.localdate()
+    return await availability_cache.aget_snapshots(list(master_ids), date, acompute_availability_snapshots)
+
+
+# bir nechta master uchun availability ni 2 ta query bilan hisoblaydi
+def get_masters_availability(masters, date=None):
+    """
+    {master_id: availability_dict} qaytaradi.
+    Sahifadagi barcha masterlar uchun snapshotlar cachedan olinadi, yo'qlari
+    MasterAvailability va Booking bittadan bulk query bilan hisoblanadi.
+    """
+    master_ids = [m.id for m in masters]
+    if not master_ids:
+        return {}
+    return _availability_from_snapshots(master_ids, get_availability_snapshots(master_ids, date))
+
+
+async def aget_masters_availability(masters, date=None):
+    master_ids = [m.id for m in masters]
+    if not master_ids:
+        return {}
+    return _availability_from_snapshots(master_ids, await aget_availability_snapshots(master_ids, date))
+
+
+def _availability_from_snapshots(master_ids, snapshots):
+    result = {master_id: _empty_availability() for master_id in master_ids}
+    for master_id, snapshot in snapshots.items():
+        if snapshot["free"]:
+            result[master_id] = {
+                "is_available_today": True,
+                "next_available_time": slot_bitmap.first_slot(snapshot["free"]),
+                "discount_percent": snapshot["discount"]
+            }
+
+    return result
+
+
+class SlotBit(Func):
+    """
+    SlotBit(bitmap, index) -> 1 | 0: slots.to_bytes() formatidagi bitmapning
+    index-biti (big-endian, 0-bit oxirgi baytda). Noto'g'ri uzunlikdagi bitmap -> 0.
+    """
+    output_field = IntegerField()
+    arity = 2
+
+    def _compile_args(self, compiler, connection):
+        bitmap_sql, bitmap_params = compiler.compile(self.source_expressions[0])
+        index_sql, index_params = compiler.compile(self.source_expressions[1])
+        return bitmap_sql, tuple(bitmap_params), index_sql, tuple(index_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # SQLite: blob baytini hex orqali songa aylantiramiz
+        bitmap, bitmap_params, index, index_params = self._compile_args(compiler, connection)
+        position = f"({slot_bitmap.BITMAP_BYTES} - ({index}) / 8)"
+        byte = (
+            f"((instr('0123456789ABCDEF', substr(hex(substr({bitmap}, {position}, 1)), 1, 1)) - 1) * 16"
+            f" + instr('0123456789ABCDEF', substr(hex(substr({bitmap}, {position}, 1)), 2, 1)) - 1)"
+        )
+        sql = f"(CASE WHEN length({bitmap}) = {slot_bitmap.BITMAP_BYTES} THEN (({byte} >> (({index}) %% 8)) & 1) ELSE 0 END)"
+        params = bitmap_params + bitmap_params + index_params + bitmap_params + index_params + index_params
+        return sql, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        bitmap, bitmap_params, index, index_params = self._compile_args(compiler, connection)
+        sql = (
+            f"(CASE WHEN length({bitmap}) = {slot_bitmap.BITMAP_BYTES} THEN "
+            f"((get_byte({bitmap}, {slot_bitmap.BITMAP_BYTES - 1} - floor({index})::integer / 8) >> (floor({index})::integer %% 8)) & 1) "
+            f"ELSE 0 END)"
+        )
+        return sql, bitmap_params + bitmap_params + index_params + index_params
+
+
+# masterlar querysetiga bugungi slot va band qilingan slotlar sonini qo'shadi.
+# Band slot = aktiv booking vaqti shu kungi jadval bitmapida bor (to'rga tushmagan yoki
+# jadvaldan tashqari vaqtlar hisobga olinmaydi) - get_free_slots bilan bir xil qoida.
+def annotate_today_availability(queryset, date=None):
+    if not date:
+        date = timezone.localdate()
+
+    # JSON ro'yxat uzunligi emas: takroriy / to'rga tushmagan slotlar bitmapda yo'q
+    slots_count = MasterAvailability.objects.filter(
+        master=OuterRef('pk'),
+        date=date
+    ).values('slots_count')[:1]
+
+    template_slots_count = MasterWeeklySchedule.objects.filter(
+        master=OuterRef('pk'),
+        weekday=date.weekday()
+    ).values('slots_count')[:1]
+
+    # bookingning masteri uchun shu kungi bitmap: aniq qator, bo'lmasa shablon
+    schedule_bitmap = Coalesce(
+        Subquery(MasterAvailability.objects.filter(
+            master_id=OuterRef('master_id'),
+            date=date
+        ).values('slots_bitmap')[:1]),
+        Subquery(MasterWeeklySchedule.objects.filter(
+            master_id=OuterRef('master_id'),
+            weekday=date.weekday()
+        ).values('slots_bitmap')[:1]),
     )
 
-    booked_times = [b.time.strftime("%H:%M") for b in bookings]
+    booked_count = Booking.objects.filter(
+        active_bookings_q(),
+        master_id=OuterRef('pk'),
+        date=date
+    ).annotate(
+        off_grid=Mod(ExtractMinute('time'), slot_bitmap.SLOT_MINUTES) + ExtractSecond('time'),
+        slot=(ExtractHour('time') * 60 + ExtractMinute('time')) / slot_bitmap.SLOT_MINUTES,
+    ).filter(
+        off_grid=0
+    ).annotate(
+        in_schedule=SlotBit(schedule_bitmap, F('slot'))
+    ).filter(
+        in_schedule=1
+    ).order_by().values('master_id').annotate(
+        n=Count('time', distinct=True)
+    ).values('n')[:1]
+
+    return queryset.annotate(
+        # aniq qator bo'lsa u (0 ta slot bo'lsa ham), bo'lmasa shablon
+        today_slots_count=Coalesce(
+            Subquery(slots_count), Subquery(template_slots_count), 0, output_field=IntegerField()
+        ),
+        today_booked_count=Coalesce(Subquery(booked_count), 0),
+    )
 
-    free_slots = [s for s in slots if s not in booked_times]
 
-    if not free_slots:
-        return {
-            "is_available_today": False,
-            "next_available_time": None,
-            "discount_percent": 0
-        }
+# faqat bugun kamida bitta bo'sh sloti bor masterlar (bitta SQL da)
+def filter_available_today(queryset, date=None):
+    return annotate_today_availability(queryset, date).filter(
+        today_slots_count__gt=F('today_booked_count')
+    )
 
-    return {
-        "is_available_today": True,
-        "next_available_time": free_slots[0],
-        "discount_percent": availability.discount_percent
-    }
 
+# ETag uchun arzon version stamp: masterning shu kungi jadvali va bookinglari
+# qachon o'zgargani. active soni muddati o'tgan pending bookinglarni (updated_at
+# o'zgarmasa ham) hisobga olish uchun.
+def _change_stamp_querysets(master_ids, date):
+    availability_rows = MasterAvailability.objects.filter(
+        master_id__in=master_ids,
+        date=date
+    ).values_list('master_id', 'updated_at')
 
-def get_next_available_time(master):
-    today = date.today()
-    availability = master.availabilities.filter(date=today).first()
-    if not availability:
-        return None
-    
-    available_slots = availability.available_slots or []
+    booking_rows = Booking.objects.filter(
+        master_id__in=master_ids,
+        date=date
+    ).values('master_id').annotate(
+        changed=Max('updated_at'),
+        active=Count('id', filter=active_bookings_q())
+    ).values_list('master_id', 'changed', 'active')
 
-    booked_slots = Booking.objects.filter(
-        master_id=master.id,
-        date=today,
-        status=BookingStatus.CONFIRMED
-        ).values_list('time', flat=True)
-    
-    free_slots = [
-        slot for slot in available_slots if slot not in booked_slots
-        ]
-    
-    return min(free_slots) if free_slots else None
+    template_rows = MasterWeeklySchedule.objects.filter(
+        master_id__in=master_ids,
+        weekday=date.weekday()
+    ).values_list('master_id', 'updated_at')
+
+    return availability_rows, booking_rows, template_rows
+
+
+def _build_change_stamps(master_ids, date, availability_rows, booking_rows, template_rows):
+    stamps = {master_id: [date.isoformat(), None, None, 0, None] for master_id in master_ids}
+    for master_id, updated_at in availability_rows:
+        stamps[master_id][1] = updated_at
+    for master_id, changed, active in booking_rows:
+        stamps[master_id][2:4] = [changed, active]
+    for master_id, updated_at in template_rows:
+        stamps[master_id][4] = updated_at
+    return stamps
+
+
+def get_masters_change_stamps(master_ids, date=None):
+    if not date:
+        date = timezone.localdate()
+    if not master_ids:
+        return {}
+    return _build_change_stamps(master_ids, date, *_change_stamp_querysets(master_ids, date))
+
+
+async def aget_masters_change_stamps(master_ids, date=None):
+    if not date:
+        date = timezone.localdate()
+    if not master_ids:
+        return {}
+    rows = [[row async for row in queryset] for queryset in _change_stamp_querysets(master_ids, date)]
+    return _build_change_stamps(master_ids, date, *rows)
+
+
+def find_next_available(master_ids, start_date=None, days=14, window_days=7, now=None):
+    """
+    {master_id: (date, "HH:MM") | None} - har bir master uchun start_date dan
+    days kun ichidagi eng erta bo'sh slot. Kunlar window_days lik oynalar bilan
+    ko'riladi: har oyna uchun MasterAvailability va Booking bittadan range query,
+    hamma masterga javob topilsa keyingi oynalar o'qilmaydi.
+    Bugun uchun o'tib ketgan slotlar hisobga olinmaydi.
+    """
+    if now is None:
+        now = timezone.now()
+    today = timezone.localdate(now)
+    if not start_date:
+        start_date = today
+
+    result = {master_id: None for master_id in master_ids}
+    pending = set(result)
+    if not pending or days <= 0:
+        return result
+
+    templates = _build_templates(_templates_qs(pending))
+
+    for window_start, window_end in _windows(start_date, days, window_days):
+        if not pending:
+            break
+        explicit_qs, booked_qs = _window_querysets(pending, window_start, window_end, now)
+        _scan_window(result, pending, templates, explicit_qs, booked_qs, window_start, window_end, today, now)
+
+    return result
+
+
+async def afind_next_available(master_ids, start_date=None, days=14, window_days=7, now=None):
+    if now is None:
+        now = timezone.now()
+    today = timezone.localdate(now)
+    if not start_date:
+        start_date = today
+
+    result = {master_id: None for master_id in master_ids}
+    pending = set(result)
+    if not pending or days <= 0:
+        return result
+
+    templates = _build_templates([t async for t in _templates_qs(pending)])
+
+    for window_start, window_end in _windows(start_date, days, window_days):
+        if not pending:
+            break
+        explicit_qs, booked_qs = _window_querysets(pending, window_start, window_end, now)
+        explicit = [a async for a in explicit_qs]
+        booked_rows = [row async for row in booked_qs]
+        _scan_window(result, pending, templates, explicit, booked_rows, window_start, window_end, today, now)
+
+    return result
+
+
+def _templates_qs(master_ids):
+    return MasterWeeklySchedule.objects.filter(master_id__in=master_ids).only('master_id', 'weekday', 'slots_bitmap')
+
+
+def _build_templates(rows):
+    templates = defaultdict(dict)
+    for t in rows:
+        templates[t.master_id][t.weekday] = t.slots_mask
+    return templates
+
+
+def _windows(start_date, days, window_days):
+    end_date = start_date + timedelta(days=days)
+    window_start = start_date
+    while window_start < end_date:
+        window_end = min(window_start + timedelta(days=window_days), end_date)
+        yield window_start, window_end
+        window_start = window_end
+
+
+def _window_querysets(master_ids, window_start, window_end, now):
+    explicit = MasterAvailability.objects.filter(
+        master_id__in=master_ids,
+        date__gte=window_start,
+        date__lt=window_end
+    ).only('master_id', 'date', 'slots_bitmap')
+    booked = Booking.objects.filter(
+        active_bookings_q(now),
+        master_id__in=master_ids,
+        date__gte=window_start,
+        date__lt=window_end
+    ).values_list('master_id', 'date', 'time')
+    return explicit, booked
+
+
+# bitta oyna kunlarini ko'rib chiqadi, topilgan masterlarni pending dan olib tashlaydi
+def _scan_window(result, pending, templates, explicit_rows, booked_rows, window_start, window_end, today, now):
+    explicit = {(a.master_id, a.date): a.slots_mask for a in explicit_rows}
+    booked = defaultdict(list)
+    for master_id, booked_date, booked_time in booked_rows:
+        booked[(master_id, booked_date)].append(booked_time)
+
+    day = window_start
+    while pending and day < window_end:
+        for master_id in sorted(pending):
+            key = (master_id, day)
+            mask = explicit[key] if key in explicit else templates[master_id].get(day.weekday(), 0)
+            if day == today:
+                mask &= slot_bitmap.upcoming_mask(timezone.localtime(now).time())
+            free = slot_bitmap.free_mask(mask, slot_bitmap.encode_times(booked[key]))
+            if free:
+                result[master_id] = (day, slot_bitmap.first_slot(free))
+                pending.discard(master_id)
+        day += timedelta(days=1)
+
+
+def get_next_available_time(master):
+    return slot_bitmap.first_slot(get_availability_snapshots([master.id])[master.id]["free"])
@@ -1,102 +1,240 @@
 from email.mime import text
-from core.sms import eskiz_send_sms
 from django.shortcuts import  render, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from rest_framework.generics import CreateAPIView, UpdateAPIView, GenericAPIView, RetrieveAPIView
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from rest_framework import status 
 from rest_framework.permissions import IsAuthenticated, BasePermission, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from django.conf import settings
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Booking, Master, MasterAvailability, OTP, GuestProfile
+from rest_framework.settings import api_settings
+from .models import Booking, BookingStatus, Master, MasterAvailability, MasterWeeklySchedule, OTP, GuestProfile
 from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+import json
+import math
 import random
-from datetime import timedelta
+from datetime import datetime, timedelta
 from .serializers import(BookingCompleteSerializer, BookingCreateSerializer, BookingResponseSerializer, 
-                        BookingMasterActionSerializer, BookingClientConfirmSerializer, EmptySerializer,  MasterCreateSerializer,
-                        MasterListSerializer, MasterAvailabilitySerializer, SendOtpSerializer, VerifyOtpSerializer,
-                        GuestCreateSerializer, MasterDetailSerializer, GuestUpdateSerializer)
-from core.utils import cancel_expired_bookings, get_today_availability, get_next_available_time
+                        BookingMasterActionSerializer, BookingBulkActionSerializer, BookingClientConfirmSerializer, EmptySerializer,  MasterCreateSerializer,
+                        MasterListSerializer, MasterAvailabilitySerializer, MasterWeeklyScheduleSerializer, SendOtpSerializer, VerifyOtpSerializer,
+                        GuestCreateSerializer, MasterDetailSerializer, GuestUpdateSerializer, NearbyMasterSerializer)
+from core.events import get_broker
+from core.conditional import etag_matches, master_row_stamp, not_modified, weak_etag
+from core import availability_cache, slots as slot_bitmap
+from core.bookings import TRANSITIONS, bulk_master_action, client_confirm_q, effective_status_expression, transition
+from core.pagination import KeysetPagination
+from core.renderers import CSVRenderer, NDJSONRenderer
+from core.utils import cancel_expired_slot_booking, find_next_available, get_masters_availability, get_masters_change_stamps, filter_available_today, find_nearby_master_ids
 
 
 
 
 
+class SlotAlreadyBooked(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This time slot is already booked for the selected master."
+    default_code = "slot_already_booked"
+
+
+class InvalidBookingTransition(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Booking hozirgi holatida bu amalni bajarib bo'lmaydi."
+    default_code = "invalid_transition"
+
+
+def _transition_or_raise(booking_id, target, condition_error=None, **kwargs):
+    """
+    transition() ni bajaradi; o'xshamasa sababini aniqlash uchun bookingni
+    faqat shundan keyin o'qiydi: 404, shart bajarilmagan (400) yoki 409.
+    """
+    if transition(booking_id, target, **kwargs):
+        return
+
+    booking = Booking.objects.filter(id=booking_id).only('status', 'expires_at').first()
+    if booking is None:
+        raise NotFound("Booking topilmadi.")
+    current = booking.effective_status
+    if condition_error and current in TRANSITIONS[target]:
+        raise ValidationError({"detail": condition_error})
+    raise InvalidBookingTransition({"detail": InvalidBookingTransition.default_detail, "status": current})
+
+
 class BookingCreateView(CreateAPIView):
     queryset = Booking.objects.all()
     serializer_class = BookingCreateSerializer
 
     def create(self, request, *args, **kwargs):
-        cancel_expired_bookings() 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        booking = serializer.save()
+
+        # slot band bo'lsa partial unique constraint INSERT ni rad etadi
+        try:
+            with transaction.atomic():
+                booking = serializer.save()
+        except IntegrityError:
+            # slotni muddati o'tgan (sweeper hali bekor qilmagan) pending booking
+            # egallab turgan bo'lsa, uni bekor qilib bir marta qayta urinamiz
+            data = serializer.validated_data
+            if not cancel_expired_slot_booking(data['master_id'], data['date'], data['time']):
+                raise SlotAlreadyBooked()
+            try:
+                with transaction.atomic():
+                    booking = serializer.save()
+            except IntegrityError:
+                raise SlotAlreadyBooked()
         response_serializer = BookingResponseSerializer(booking)
         return Response(response_serializer.data, status=201)
 
 
-class BookingMasterActionView(UpdateAPIView):
+class BookingMasterActionView(GenericAPIView):
     queryset = Booking.objects.all()
     serializer_class = BookingMasterActionSerializer
     lookup_field = 'id'
 
     def patch(self, request, *args, **kwargs):
-        booking = self.get_object()
-        serializer = self.get_serializer(booking, data=request.data, partial=True)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        target = serializer.validated_data['status']
+        reason = serializer.validated_data.get('reject_reason')
+        fields = {'reject_reason': reason} if target == BookingStatus.REJECTED else {}
+        _transition_or_raise(kwargs['id'], target, **fields)
+
+        data = {"booking_id": kwargs['id'], "status": target}
+        if target == BookingStatus.REJECTED:
+            data["reason"] = reason
+        return Response(data)
+
+
+# master navbatdagi bir nechta bookingni bitta so'rov bilan accept/reject qiladi
+class BookingBulkMasterActionView(GenericAPIView):
+    serializer_class = BookingBulkActionSerializer
+
+    def post(self, request, master_id):
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
 
+        actions = serializer.validated_data['actions']
+        results = bulk_master_action(master_id, actions)
+
+        return Response({
+            "results": [
+                {"booking_id": action['booking_id'], **results[action['booking_id']]}
+                for action in actions
+            ]
+        })
 
-class BookingClientConfirmAPIView(UpdateAPIView):
+
+class BookingClientConfirmAPIView(GenericAPIView):
     queryset = Booking.objects.all()
     serializer_class = BookingClientConfirmSerializer
     lookup_field = 'id'
 
     def patch(self, request, *args, **kwargs):
-        booking = self.get_object()
-        serializer = self.get_serializer(booking, data=request.data, partial=True)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        booking.client_confirmed = serializer.validated_data.get('client_confirmed', booking.client_confirmed)
-        if booking.client_confirmed:
-            booking.status = "confirmed"
-        booking.save()
+        # rad etsa slot bo'shaydi (client_not_confirmed aktiv holat emas)
+        client_confirmed = serializer.validated_data['client_confirmed']
+        target = BookingStatus.CONFIRMED if client_confirmed else BookingStatus.CLIENT_NOT_CONFIRMED
+        now = timezone.now()
+        _transition_or_raise(
+            kwargs['id'],
+            target,
+            now=now,
+            condition=client_confirm_q(now),
+            condition_error="Faqat buyurtmadan 30 daqiqa oldin tasdiqlashingiz mumkin.",
+            client_confirmed=client_confirmed,
+        )
 
         return Response({
-            "booking_id": booking.id,
-            "status": booking.status
+            "booking_id": kwargs['id'],
+            "status": target
         })
 
 
 
-class BookingCompleteAPIView(UpdateAPIView):
+class BookingCompleteAPIView(GenericAPIView):
     queryset = Booking.objects.all()
     serializer_class = BookingCompleteSerializer
     lookup_field = 'id'
 
     def patch(self, request, id):
-        booking = get_object_or_404(Booking, id=id)
-
-        serializer = BookingCompleteSerializer(
-            booking,
-            data={},
-            partial=True
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        _transition_or_raise(id, BookingStatus.COMPLETED)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response({"booking_id": id, "status": BookingStatus.COMPLETED}, status=status.HTTP_200_OK)
     
 
 
+SSE_HEARTBEAT_SECONDS = 15
+
+
+# booking o'zgarishlari SSE stream i (faqat ASGI: timey/asgi.py).
+# ?master_id=... yoki ?booking_id=..., qayta ulanishda Last-Event-ID dan davom etadi
+async def booking_events(request):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "SSE faqat ASGI server orqali ishlaydi."}, status=501)
+
+    try:
+        master_id = int(request.GET['master_id']) if 'master_id' in request.GET else None
+        booking_id = int(request.GET['booking_id']) if 'booking_id' in request.GET else None
+    except ValueError:
+        return JsonResponse({"detail": "master_id va booking_id son bo'lishi kerak."}, status=400)
+    if master_id is None and booking_id is None:
+        return JsonResponse({"detail": "master_id yoki booking_id kerak."}, status=400)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    async def stream():
+        yield "retry: 3000\n\n"
+        async for item in get_broker().listen(last_event_id, heartbeat=SSE_HEARTBEAT_SECONDS):
+            if item is None:
+                yield ": ping\n\n"
+                continue
+            event_id, event = item
+            if master_id is not None and event["master_id"] != master_id:
+                continue
+            if booking_id is not None and event["booking_id"] != booking_id:
+                continue
+            yield f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("status", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("master_id", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Oldingi javobdagi next_cursor"),
+        OpenApiParameter("size", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Har sahifada nechta booking (max 100)"),
+        OpenApiParameter("with_total", OpenApiTypes.BOOL, OpenApiParameter.QUERY, description="true bo‘lsa total ham hisoblanadi"),
+        OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Booking sanasi shu kundan (YYYY-MM-DD)"),
+        OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Booking sanasi shu kungacha (YYYY-MM-DD)"),
+        OpenApiParameter("format", OpenApiTypes.STR, OpenApiParameter.QUERY, description="ndjson yoki csv bo‘lsa barcha bookinglar stream qilinadi"),
+    ]
+)
 class BookingListAPIView(GenericAPIView):
     serializer_class = BookingResponseSerializer
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer]
+    pagination = KeysetPagination(ordering=('-created_at', '-id'), default_size=20)
+
+    EXPORT_FIELDS = (
+        'id', 'user_id', 'master_id', 'service_type', 'date', 'time',
+        'payment_type', 'status', 'expires_at', 'reject_reason',
+        'client_confirmed', 'created_at', 'updated_at',
+    )
+    EXPORT_CHUNK_SIZE = 2000
 
     def get_queryset(self):
         queryset = Booking.objects.all()
@@ -104,18 +242,74 @@ class BookingListAPIView(GenericAPIView):
         status_param = self.request.query_params.get("status")
         master_id = self.request.query_params.get("master_id")
 
-        if status_param:
+        # muddati o'tgan pending lar sweeper ishlamagan bo'lsa ham cancelled hisoblanadi
+        if status_param == BookingStatus.PENDING:
+            queryset = queryset.filter(status=status_param, expires_at__gte=timezone.now())
+        elif status_param == BookingStatus.CANCELLED:
+            queryset = queryset.filter(
+                Q(status=status_param) | Q(status=BookingStatus.PENDING, expires_at__lt=timezone.now())
+            )
+        elif status_param:
             queryset = queryset.filter(status=status_param)
 
         if master_id:
             queryset = queryset.filter(master_id=master_id)
 
+        for param, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    value = datetime.strptime(value, "%Y-%m-%d").date()
+                except ValueError:
+                    raise ValidationError({param: "Sana YYYY-MM-DD formatida bo'lishi kerak."})
+                queryset = queryset.filter(**{lookup: value})
+
         return queryset
 
+    def perform_content_negotiation(self, request, force=False):
+        # DRF noma'lum ?format= uchun 404 beradi
+        try:
+            return super().perform_content_negotiation(request, force)
+        except Http404:
+            raise ValidationError({"format": "json, ndjson yoki csv bo'lishi kerak."})
+
+    # ndjson/csv: butun ro'yxatni xotiraga yig'may, qatorma-qator stream qiladi
+    def export(self, request):
+        renderer = request.accepted_renderer
+        # status o'rniga effective status: muddati o'tgan pending cancelled bo'lib chiqadi
+        columns = ['export_status' if field == 'status' else field for field in self.EXPORT_FIELDS]
+        rows = (
+            dict(zip(self.EXPORT_FIELDS, row))
+            for row in self.get_queryset()
+            .annotate(export_status=effective_status_expression())
+            .order_by('id')
+            .values_list(*columns)
+            .iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+        )
+        if isinstance(renderer, CSVRenderer):
+            content = renderer.stream(rows, fields=self.EXPORT_FIELDS)
+        else:
+            content = renderer.stream(rows)
+
+        response = StreamingHttpResponse(content, content_type=f"{renderer.media_type}; charset={renderer.charset}")
+        response["Content-Disposition"] = f'attachment; filename="bookings.{renderer.format}"'
+        return response
+
     def get(self, request, *args, **kwargs):
-        bookings = self.get_queryset()
+        if isinstance(request.accepted_renderer, (NDJSONRenderer, CSVRenderer)):
+            return self.export(request)
+
+        bookings, next_cursor, total = self.pagination.paginate_queryset(self.get_queryset(), request)
         serializer = self.get_serializer(bookings, many=True)
-        return Response(serializer.data)
+
+        data = {
+            "size": len(bookings),
+            "next_cursor": next_cursor,
+            "results": serializer.data,
+        }
+        if total is not None:
+            data["total"] = total
+        return Response(data)
 
 
 ###### MASTER BOOKING LIST VIEW ##########
@@ -133,64 +327,161 @@ class MasterCreateAPIView(CreateAPIView): # master yaratish uchun
 
 
 
+# master list: DRF va async (core/async_views.py) view lar uchun umumiy qism,
+# querylarni faqat view o'zi (sync yoki async) bajaradi
+def _master_list_querysets(request):
+    """
+    (page_queryset, total_queryset | None, build_page) qaytaradi.
+    build_page(items, total) -> (masters_page, meta).
+    """
+    params = request.GET
+    masters = Master.objects.select_related('master_location').filter(
+        service_type=params.get('service_type', 'barber')
+    )
+    if params.get('only_available') == 'true':
+        masters = filter_available_today(masters)
+
+    if params.get('sort') == 'rating':
+        pagination = KeysetPagination(ordering=('-rating', '-id'))
+    else:
+        pagination = KeysetPagination(ordering=('id',))
+
+    if 'page' in params:
+        # eski klientlar uchun offset pagination
+        page = int(params.get('page', 1))
+        size = pagination.get_size(request)
+        masters = masters.order_by(*pagination.ordering)
+        start = (page - 1) * size
+
+        def build_page(items, total):
+            return items, {"page": page, "size": size, "total": total}
+
+        return masters[start:start + size], masters, build_page
+
+    size, total_queryset, page_queryset = pagination.page_querysets(masters, request)
+
+    def build_page(items, total):
+        items, next_cursor = pagination.split_page(items, size)
+        meta = {"size": len(items), "next_cursor": next_cursor}
+        if total is not None:
+            meta["total"] = total
+        return items, meta
+
+    return page_queryset, total_queryset, build_page
+
+
+def _master_list_etag(request, meta, masters_page, stamps):
+    return weak_etag(
+        request.get_full_path(),
+        meta,
+        [(master_row_stamp(m), stamps[m.id]) for m in masters_page],
+    )
+
+
 @extend_schema(
     parameters=[
-        OpenApiParameter("page", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Sahifa raqami (1,2,3...)"),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Oldingi javobdagi next_cursor"),
+        OpenApiParameter("page", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Eski offset pagination (1,2,3...), cursor afzal"),
         OpenApiParameter("size", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Har sahifada nechta master"),
+        OpenApiParameter("with_total", OpenApiTypes.BOOL, OpenApiParameter.QUERY, description="true bo‘lsa total ham hisoblanadi"),
         OpenApiParameter("service_type", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Masalan: barber"),
         OpenApiParameter("only_available", OpenApiTypes.BOOL, OpenApiParameter.QUERY, description="true bo‘lsa faqat bo‘shlar"),
         OpenApiParameter("sort", OpenApiTypes.STR, OpenApiParameter.QUERY, description="rating bo‘yicha tartib"),
+        OpenApiParameter("If-None-Match", OpenApiTypes.STR, OpenApiParameter.HEADER, description="Oldingi javobdagi ETag, o'zgarmagan bo'lsa 304"),
     ]
 )
 class MasterListAPIView(APIView):
     serializer_class = EmptySerializer #masterlarni filterlab olish uchun
     def get(self, request):
-        masters = Master.objects.all()
-
-        # service_type boyicha filterlash
-        service_type = request.query_params.get('service_type', 'barber')
-        masters = masters.filter(service_type=service_type)
-
-        # faqat mavjud bo'lganlarni olish
-        only_available = request.query_params.get('only_available')
-        if only_available == 'true':
-            masters = [
-                m for m in masters
-                if get_today_availability(m)["is_available_today"]
-            ]
-        
-        #sort boyicha tartiblash
-        sort = request.query_params.get('sort')
-        if sort == 'rating':
-            masters = masters.order_by('-rating')
-
-
-        #pagination
-        page = int(request.query_params.get('page', 1))
-        size = int(request.query_params.get('size', 5))
-
-        total = len(masters) if isinstance(masters, list) else masters.count()
-        start = (page - 1) * size
-        end = start + size
-
-        masters_page = masters[start:end]
+        # filter, sort va pagination: _master_list_querysets
+        page_queryset, total_queryset, build_page = _master_list_querysets(request)
+        total = total_queryset.count() if total_queryset is not None else None
+        masters_page, meta = build_page(list(page_queryset), total)
 
+        # o'zgarmagan sahifa uchun 304, serializer va availability hisoblanmaydi
+        stamps = get_masters_change_stamps([m.id for m in masters_page])
+        etag = _master_list_etag(request, meta, masters_page, stamps)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
+        # sahifadagi masterlar availability si bitta bulk hisob bilan
+        availability = get_masters_availability(masters_page)
 
         serializer = MasterListSerializer(
             masters_page, 
             
             many = True, 
-            context={'request': request}
+            context={'request': request, 'availability': availability}
             )
         
-        return Response({
-            "page": page,
-            "size": size,
-            "total": total,
+        response = Response({
+            **meta,
             "results": serializer.data
         })
+        response['ETag'] = etag
+        return response
     
+@extend_schema(
+    parameters=[
+        OpenApiParameter("lat", OpenApiTypes.FLOAT, OpenApiParameter.QUERY, required=True, description="Klient latitude"),
+        OpenApiParameter("lng", OpenApiTypes.FLOAT, OpenApiParameter.QUERY, required=True, description="Klient longitude"),
+        OpenApiParameter("radius_km", OpenApiTypes.FLOAT, OpenApiParameter.QUERY, description="Qidiruv radiusi km da (default 5, max 50)"),
+        OpenApiParameter("size", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Nechta eng yaqin master (default 20, max 100)"),
+        OpenApiParameter("service_type", OpenApiTypes.STR, OpenApiParameter.QUERY, description="Masalan: barber"),
+        OpenApiParameter("only_available", OpenApiTypes.BOOL, OpenApiParameter.QUERY, description="true bo‘lsa faqat bo‘shlar"),
+    ]
+)
+class MasterNearbyAPIView(APIView):
+    serializer_class = EmptySerializer # eng yaqin masterlarni masofa bo'yicha qaytaradi
+    DEFAULT_RADIUS_KM = 5
+    MAX_RADIUS_KM = 50
+    DEFAULT_SIZE = 20
+    MAX_SIZE = 100
+
+    def get(self, request):
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            radius_km = float(request.query_params.get('radius_km', self.DEFAULT_RADIUS_KM))
+            size = int(request.query_params.get('size', self.DEFAULT_SIZE))
+        except KeyError:
+            raise ValidationError({"detail": "lat va lng kerak."})
+        except ValueError:
+            raise ValidationError({"detail": "lat, lng, radius_km va size son bo'lishi kerak."})
+
+        # nan/inf: taqqoslashlar False bo'ladi, shuning uchun alohida tekshiriladi
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180 and math.isfinite(radius_km)):
+            raise ValidationError({"detail": "lat/lng yoki radius_km noto'g'ri."})
+        radius_km = max(0.0, min(radius_km, self.MAX_RADIUS_KM))
+        size = max(1, min(size, self.MAX_SIZE))
+
+        masters = Master.objects.filter(service_type=request.query_params.get('service_type', 'barber'))
+        if request.query_params.get('only_available') == 'true':
+            masters = filter_available_today(masters)
+
+        nearby = find_nearby_master_ids(lat, lng, radius_km, size, queryset=masters.values('id'))
+        distances = dict(nearby)
+
+        masters_by_id = Master.objects.select_related('master_location').in_bulk(list(distances))
+        masters_page = [masters_by_id[master_id] for master_id, _ in nearby if master_id in masters_by_id]
+
+        serializer = NearbyMasterSerializer(
+            masters_page,
+            many=True,
+            context={
+                'request': request,
+                'distances': distances,
+                'availability': get_masters_availability(masters_page),
+            }
+        )
+
+        return Response({
+            "lat": lat,
+            "lng": lng,
+            "radius_km": radius_km,
+            "results": serializer.data
+        })
+
 #
 class MasterAvailabilityPatchAPIView(GenericAPIView):
     serializer_class = MasterAvailabilitySerializer
@@ -218,22 +509,170 @@ class MasterAvailabilityPatchAPIView(GenericAPIView):
         )
 
 
+# bir nechta sanani bitta so'rov bilan yozish (masalan bir oylik jadval)
+class MasterAvailabilityBulkUpsertAPIView(GenericAPIView):
+    serializer_class = MasterAvailabilitySerializer
+    MAX_ITEMS = 93
+
+    def post(self, request, master_id):
+        master = get_object_or_404(Master, id=master_id)
+
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.MAX_ITEMS)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        dates = [item['date'] for item in items]
+        rows = []
+        for item in items:
+            # bulk_create save() ni chaqirmaydi, bitmap shu yerda hisoblanadi
+            mask = slot_bitmap.encode_slots(item['available_slots'])
+            rows.append(MasterAvailability(
+                master=master,
+                date=item['date'],
+                available_slots=item['available_slots'],
+                slots_bitmap=slot_bitmap.to_bytes(mask),
+                slots_count=mask.bit_count(),
+                discount_percent=item.get('discount_percent', 0),
+            ))
+
+        with transaction.atomic():
+            existing = set(
+                MasterAvailability.objects.filter(master=master, date__in=dates).values_list('date', flat=True)
+            )
+            MasterAvailability.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['master', 'date'],
+                update_fields=['available_slots', 'slots_bitmap', 'slots_count', 'discount_percent', 'updated_at'],
+            )
+            # bulk_create post_save signal bermaydi
+            for availability_date in dates:
+                availability_cache.invalidate(master.id, availability_date)
+
+        return Response(
+            {
+                'success': True,
+                'results': [
+                    {'date': d.isoformat(), 'status': 'updated' if d in existing else 'created'}
+                    for d in dates
+                ],
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+# haftalik jadval shabloni: aniq MasterAvailability qatori yo'q sanalar shundan hisoblanadi
+class MasterWeeklyScheduleAPIView(GenericAPIView):
+    serializer_class = MasterWeeklyScheduleSerializer
+
+    def get(self, request, master_id):
+        master = get_object_or_404(Master, id=master_id)
+        return Response(self.get_serializer(master.weekly_schedule.order_by('weekday'), many=True).data)
+
+    # butun haftani almashtiradi: ro'yxatda yo'q kunlar dam olish kuni bo'ladi
+    def put(self, request, master_id):
+        master = get_object_or_404(Master, id=master_id)
+
+        serializer = self.get_serializer(data=request.data, many=True, max_length=7)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            weekdays = [item['weekday'] for item in serializer.validated_data]
+            master.weekly_schedule.exclude(weekday__in=weekdays).delete()
+            for item in serializer.validated_data:
+                MasterWeeklySchedule.objects.update_or_create(
+                    master=master,
+                    weekday=item['weekday'],
+                    defaults=item,
+                )
+
+        return Response(self.get_serializer(master.weekly_schedule.order_by('weekday'), many=True).data)
+
+
 #master detail uchun
+@extend_schema(
+    parameters=[
+        OpenApiParameter("If-None-Match", OpenApiTypes.STR, OpenApiParameter.HEADER, description="Oldingi javobdagi ETag, o'zgarmagan bo'lsa 304"),
+    ]
+)
 class MasterDetailAPIView(RetrieveAPIView):
-    queryset = Master.objects.all()
+    queryset = Master.objects.select_related('master_location')
     serializer_class = MasterDetailSerializer
     lookup_field = 'id'  
 
+    def retrieve(self, request, *args, **kwargs):
+        master = self.get_object()
+
+        etag = weak_etag(master_row_stamp(master), get_masters_change_stamps([master.id])[master.id])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = Response(self.get_serializer(master).data)
+        response['ETag'] = etag
+        return response
+
+
+NEXT_AVAILABLE_DEFAULT_DAYS = 14
+NEXT_AVAILABLE_MAX_DAYS = 60
+
+
+# request.GET: DRF va async (core/async_views.py) view lar uchun umumiy
+def _next_available_days(request):
+    try:
+        days = int(request.GET.get('days', NEXT_AVAILABLE_DEFAULT_DAYS))
+    except ValueError:
+        raise ValidationError({"days": "Son bo'lishi kerak."})
+    return max(1, min(days, NEXT_AVAILABLE_MAX_DAYS))
+
+
+def _next_available_payload(master_id, found):
+    next_date, next_time = found or (None, None)
+    return {
+        "master_id": str(master_id).zfill(5),
+        "next_available_date": next_date.isoformat() if next_date else None,
+        "next_available_time": next_time,
+    }
+
 
 #master keyingi mavjud vaqtni olish uchun
+@extend_schema(
+    parameters=[
+        OpenApiParameter("days", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Bugundan boshlab necha kun qidiriladi (default 14, max 60)"),
+    ]
+)
 class MasterNextAvailableTimeAPIView(APIView):
     def get(self, request, master_id):
         master = get_object_or_404(Master, id=master_id)
-        next_time = get_next_available_time(master)
+        found = find_next_available([master.id], days=_next_available_days(request))[master.id]
+
+        return Response(_next_available_payload(master.id, found))
+
+
+# bir nechta master uchun keyingi bo'sh vaqt (har master uchun alohida so'rov o'rniga)
+@extend_schema(
+    parameters=[
+        OpenApiParameter("ids", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True, description="Vergul bilan: 1,2,3 (max 100)"),
+        OpenApiParameter("days", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Bugundan boshlab necha kun qidiriladi (default 14, max 60)"),
+    ]
+)
+class MasterNextAvailableBulkAPIView(APIView):
+    serializer_class = EmptySerializer
+    MAX_IDS = 100
+
+    def get(self, request):
+        try:
+            ids = list(dict.fromkeys(int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()))
+        except ValueError:
+            raise ValidationError({"ids": "Vergul bilan ajratilgan sonlar bo'lishi kerak."})
+        if not ids or len(ids) > self.MAX_IDS:
+            raise ValidationError({"ids": f"1 tadan {self.MAX_IDS} tagacha master id kerak."})
+
+        existing = set(Master.objects.filter(id__in=ids).values_list('id', flat=True))
+        master_ids = [master_id for master_id in ids if master_id in existing]
+        found = find_next_available(master_ids, days=_next_available_days(request))
 
         return Response({
-            "master_id": str(master.id).zfill(5),
-            "next_available_time": next_time
+            "results": [_next_available_payload(master_id, found[master_id]) for master_id in master_ids]
         })
 
 
@@ -244,17 +683,13 @@ class MasterNextAvailableTimeAPIView(APIView):
 
 ### MASTER MODEL AUTH OTP VIEWs ###
 
-from .sms import eskiz_send_sms
+from .outbox import enqueue_sms
+from . import otp as otp_store
+from .otp import OTP_EXPIRES_SECONDS, OTP_RESEND_AFTER_SECONDS, generate_otp_code
 
-OTP_EXPIRES_SECONDS = 120
-OTP_RESEND_AFTER_SECONDS = 60
 ACCESS_EXPIRES_SECONDS = 3600  # 15 minut (clientga ko'rsatish uchun)
 
 
-def generate_otp_code() -> str:
-    return f"{random.randint(0, 999999):06d}"
-
-
 class MasterSendOtpAPIView(GenericAPIView):
     serializer_class = SendOtpSerializer
     authentication_classes = []
@@ -266,10 +701,17 @@ class MasterSendOtpAPIView(GenericAPIView):
 
         phone = ser.validated_data["phone"]
         now = timezone.now()
+        code = generate_otp_code()
+        expires_at = now + timedelta(seconds=OTP_EXPIRES_SECONDS)
 
-        last_otp = OTP.objects.filter(phone=phone, is_used=False).order_by("-created_at").first()
-        if last_otp and now < last_otp.resend_available_at:
-            wait_seconds = int((last_otp.resend_available_at - now).total_seconds())
+        # SMS outbox ga OTP bilan bitta transactionda yoziladi (DB store),
+        # Eskiz ga commitdan keyin, javobdan tashqarida yuboriladi (SMS_DISPATCH: fon threadi yoki dispatch_sms worker)
+        with transaction.atomic():
+            wait_seconds = otp_store.get_otp_store().issue(phone, code, now=now)
+            if not wait_seconds:
+                enqueue_sms(phone, f"Timey tasdiqlash kodi: {code}", expires_at=expires_at)
+
+        if wait_seconds:
             return Response(
                 {
                     "success": False,
@@ -279,25 +721,11 @@ class MasterSendOtpAPIView(GenericAPIView):
                 status=status.HTTP_429_TOO_MANY_REQUESTS,
             )
 
-        code = generate_otp_code()
-
-        OTP.objects.create(
-            phone=phone,
-            code=code,
-            expires_at=now + timedelta(seconds=OTP_EXPIRES_SECONDS),
-            resend_available_at=now + timedelta(seconds=OTP_RESEND_AFTER_SECONDS),
-        )
-
-        text = f"Timey tasdiqlash kodi: {code}"
-
-        
-        eskiz_send_sms(phone, text)
-
         
         return Response(
             {
                 "success": True,
-                "message": "SMS code sent",
+                "message": "SMS code queued",
                 "expires_in": OTP_EXPIRES_SECONDS,
                 "resend_after": OTP_RESEND_AFTER_SECONDS,
                 "code": code,  
@@ -320,30 +748,26 @@ class MasterVerifyOtpAPIView(GenericAPIView):
         code = ser.validated_data["code"]
         now = timezone.now()
 
-        otp = (
-            OTP.objects
-            .select_for_update()
-            .filter(phone=phone, code=code, is_used=False)
-            .order_by("-created_at")
-            .first()
-        )
+        result = otp_store.get_otp_store().verify(phone, code, now=now)
 
-        if not otp:
+        if result == otp_store.LOCKED:
+            return Response(
+                {"success": False, "message": "Too many attempts, request a new code"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+        if result == otp_store.INVALID:
             return Response(
                 {"success": False, "message": "Invalid code"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if now >= otp.expires_at:
+        if result == otp_store.EXPIRED:
             return Response(
                 {"success": False, "message": "Code expired"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ✔ OTP ishlatildi
-        otp.is_used = True
-        otp.save(update_fields=["is_used"])
-
         
         master, created = Master.objects.get_or_create(
             phone=phone,
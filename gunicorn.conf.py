@@ -0,0 +1,97 @@
+"""
+Gunicorn config (gunicorn o'zi shu fayldan o'qiydi: `gunicorn` yoki `gunicorn -c gunicorn.conf.py`).
+
+Ilova master processda bir marta yuklanadi (preload), warmup dan keyin
+gc.freeze() qilinadi: workerlar fork dan keyin shu obyektlarni copy-on-write
+orqali bo'lishadi. DB ulanishlari faqat workerlarda, trafik olishdan oldin ochiladi.
+ASGI uchun: GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker GUNICORN_APP=timey.asgi:application
+"""
+
+import gc
+import os
+
+
+wsgi_app = os.getenv("GUNICORN_APP", "timey.wsgi:application")
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# workerlar shuncha so'rovdan keyin qayta ishga tushadi (sekin xotira o'sishiga qarshi);
+# jitter hammasi bir vaqtda qayta tug'ilmasligi uchun
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = "-" if os.getenv("GUNICORN_ACCESS_LOG") == "1" else None
+
+
+if preload_app:
+    # Python gc hujjatidagi retsept: masterda gc o'chiq (xotirada "teshik" qolmasin),
+    # fork dan oldin freeze, workerda qayta yoqiladi. Master faqat workerlarni kuzatadi.
+    gc.disable()
+
+
+def warmup():
+    """
+    Birinchi so'rov to'laydigan lazy importlarni oldindan bajaradi:
+    view / serializer modullari, URLconf va reverse lug'ati.
+    """
+    from django.urls import get_resolver, reverse
+
+    import core.serializers  # noqa: F401
+    import core.views  # noqa: F401
+
+    resolver = get_resolver()
+    resolver.resolve("/masters/list/")
+    reverse("master-list")
+
+
+def open_db_connections(log):
+    from django.db import connections
+
+    for conn in connections.all():
+        pool = getattr(conn, "pool", None)
+        try:
+            if pool is not None:
+                # DB_POOL=1: min_size ta ulanish shu yerda ochiladi
+                pool.open(wait=True)
+            elif conn.settings_dict.get("CONN_MAX_AGE"):
+                # ASGI da (CONN_MAX_AGE=0) ulanish har so'rovda yopiladi, oldindan ochish foydasiz
+                conn.ensure_connection()
+        except Exception:
+            # DB hali tayyor bo'lmasa worker baribir ishga tushadi, ulanish birinchi so'rovda
+            log.exception("db warmup failed for %s", conn.alias)
+
+
+def when_ready(server):
+    if preload_app:
+        warmup()
+        server.log.info("warmup done in master")
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+
+
+def post_worker_init(worker):
+    # worker trafik olishdan oldin
+    if not preload_app:
+        warmup()
+    open_db_connections(worker.log)
+
+
+def worker_exit(server, worker):
+    # graceful restart (max_requests) da navbatdagi OTP SMS lar yo'qolmasin
+    from core import outbox
+
+    outbox.shutdown_background(wait=True)
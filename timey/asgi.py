@@ -13,4 +13,6 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'timey.settings')
 
+# Booking SSE stream (/api/bookings/events/) faqat shu ASGI application orqali
+# ishlaydi, masalan: uvicorn timey.asgi:application
 application = get_asgi_application()
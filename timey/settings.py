@@ -22,6 +22,11 @@ load_dotenv(BASE_DIR / ".env")
 
 DEV_OTP_MODE = os.getenv("DEV_OTP_MODE", "0") == "1"
 
+# SMS (OTP) yuborish (core/outbox.py): "background" - web process commitdan keyin fon
+# threadida yuboradi (alohida worker shart emas, javob SMS ni kutmaydi), "worker" - faqat
+# SmsOutbox ga yoziladi, dispatch_sms --loop service yuboradi, "inline" - faqat dev uchun
+SMS_DISPATCH = os.getenv("SMS_DISPATCH", "background")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -94,10 +99,33 @@ import dj_database_url
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# ASGI deploy (uvicorn / gunicorn -k uvicorn.workers.UvicornWorker) da master list,
+# detail va next-available-time async ORM view lari bilan ishlaydi (core/async_views.py)
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS") == "1"
+
+# Postgres connection pool (psycopg_pool, opt-in): DB_POOL=1. Pool har process (gunicorn
+# worker) uchun alohida: jami ulanishlar <= workerlar soni * DB_POOL_MAX_SIZE.
+# Pooldan olingan ulanish health check qilinadi (CONN_HEALTH_CHECKS).
+DB_POOL = os.getenv("DB_POOL") == "1"
+
 if DATABASE_URL:
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        # ASGI da persistent connection har request thread ida qolib ketadi, pool bilan esa
+        # Django uni qo'llamaydi, shuning uchun ikkalasida 0
+        "default": dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=0 if ASYNC_READ_VIEWS or DB_POOL else 600,
+            conn_health_checks=True,
+        )
     }
+    if DB_POOL:
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "4")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),  # bo'sh ulanish kutish, soniya
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),  # min_size dan ortiq bo'sh ulanish yopiladi
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        }
 else:
     DATABASES = {
         "default": {
@@ -107,6 +135,53 @@ else:
     }
 
 
+# pool statistikasi: har DB_POOL_STATS_INTERVAL soniyada hook(alias, stats) chaqiriladi (core/dbpool.py)
+DB_POOL_STATS_HOOK = os.getenv("DB_POOL_STATS_HOOK", "core.dbpool.log_pool_stats")
+DB_POOL_STATS_INTERVAL = float(os.getenv("DB_POOL_STATS_INTERVAL", "60" if DB_POOL else "0"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        # default hook (log_pool_stats) INFO darajada yozadi
+        "core.dbpool": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+
+# Cache: bir nechta node bo'lsa REDIS_URL orqali umumiy Redis, aks holda process ichidagi LocMemCache
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# OTP store: "cache" (TTL + atomik hisoblagichlar) yoki "db" (OTP jadvali).
+# LocMemCache faqat bitta process uchun, shuning uchun Redis bo'lmasa default "db"
+OTP_STORE = os.getenv("OTP_STORE", "cache" if REDIS_URL else "db")
+
+# (master, date) bo'sh slot snapshotlari cache TTL i (soniya), 0 - o'chirilgan.
+# Invalidatsiya cache orqali bo'ladi, LocMemCache da boshqa workerlar buni ko'rmaydi
+AVAILABILITY_CACHE_SECONDS = int(os.getenv("AVAILABILITY_CACHE_SECONDS", "300" if REDIS_URL else "0"))
+
+# booking SSE eventlari: bitta process uchun in-process, bir nechta node/worker uchun Redis Stream
+BOOKING_EVENTS_BROKER = os.getenv(
+    "BOOKING_EVENTS_BROKER",
+    "core.events.RedisStreamBroker" if REDIS_URL else "core.events.InProcessBroker",
+)
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -183,8 +258,6 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^https://.*\.vercel\.app$",
 ]
 
-print("### SETTINGS LOADED: CORS TEST 123 ###")
-
 TIME_ZONE = "Asia/Tashkent"
 
 SPECTACULAR_SETTINGS = {